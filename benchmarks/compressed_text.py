@@ -0,0 +1,96 @@
+"""
+Размер БД и время чтения длинных записей со сжатием текста и без.
+
+    python benchmarks/compressed_text.py
+    python benchmarks/compressed_text.py --posts 200 --size 200000
+
+Тексты собираются из словаря слов, как обычная проза. Без сжатия —
+тот же код с порогом больше любой записи: текст целиком лежит в строке
+записи. Со сжатием полный текст читается из PostBody так же, как на
+странице записи.
+"""
+import argparse
+import os
+import random
+import sys
+from timeit import repeat
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+WORDS = (
+    'и в не на я быть он с что а по это она этот к но они мы как из у '
+    'который то за свой весь год от так о для ты же все тот мочь вы '
+    'человек такой его сказать только или еще бы себя один как уже до '
+    'время если сам когда другой вот говорить наш мой знать стать при '
+    'чтобы дело жизнь кто первый очень два день ее новый рука даже во '
+    'со раз где там под можно ну какой после их работа без самый потом '
+    'надо хотеть ли слово идти большой должен место иметь ничто'
+).split()
+
+
+def text(size, rng):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)[:size]
+
+
+def database_size(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        return pages * cursor.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--posts', type=int, default=100)
+    parser.add_argument('--size', type=int, default=100_000,
+                        help='Символов в записи.')
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from django.db import connection
+    from django.test import override_settings
+
+    connection.creation.create_test_db(verbosity=0)
+
+    from posts.models import Post, User
+
+    author = User.objects.create_user(username='author')
+    rng = random.Random(0)
+    texts = [text(args.size, rng) for _ in range(args.posts)]
+    modes = {
+        'без сжатия': sys.maxsize,
+        'zlib': None,
+    }
+    for name, threshold in modes.items():
+        overrides = {} if threshold is None else {
+            'COMPRESSED_TEXT_THRESHOLD': threshold}
+        with override_settings(**overrides):
+            Post.objects.all().delete()
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+            empty = database_size(connection)
+            Post.objects.bulk_create(
+                Post(author=author, text=body) for body in texts)
+            size = database_size(connection) - empty
+            pks = list(Post.objects.values_list('pk', flat=True))
+            posts = Post.objects.select_related('body')
+            read = min(repeat(
+                lambda: [posts.get(pk=pk).full_text for pk in pks],
+                number=args.number, repeat=3,
+            )) / args.number / len(pks)
+        print(f'{name}: записи занимают {size / 2 ** 20:.1f} МБ, '
+              f'чтение записи {read * 1000:.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Загрузка и рендер страницы ленты: модели против строк ленты.
+
+    python benchmarks/feed_rows.py
+    python benchmarks/feed_rows.py --engine jinja2 --posts 10
+
+Замеряется выборка страницы из БД, сборка объектов и рендер шаблона.
+"""
+import argparse
+import os
+import sys
+from timeit import repeat
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+
+def setup(posts_count):
+    import django
+    django.setup()
+    from django.db import connection
+
+    connection.creation.create_test_db(verbosity=0)
+
+    from posts.models import Group, Post, User
+
+    authors = [
+        User.objects.create_user(
+            username=f'author{number}', first_name='Лев',
+            last_name='Толстой')
+        for number in range(3)
+    ]
+    group = Group.objects.create(
+        title='Группа', slug='group', description='Описание')
+    Post.objects.bulk_create(
+        Post(author=authors[number % 3], group=group,
+             text=f'Запись {number} ' * 20)
+        for number in range(posts_count)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--engine', default='django',
+                        choices=('django', 'jinja2'))
+    parser.add_argument('--posts', type=int, default=10)
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    setup(args.posts)
+
+    from django.core.paginator import Paginator
+    from django.template import engines
+    from django.test import RequestFactory
+    from posts.models import Post
+    from posts.rows import FeedRows
+
+    request = RequestFactory().get('/')
+    template = engines[args.engine].get_template('posts/index.html')
+    sources = {
+        'модели': lambda: Post.objects.select_related('author', 'group'),
+        'строки': lambda: FeedRows(Post.objects.all()),
+    }
+
+    def load(source):
+        return list(Paginator(source(), args.posts).get_page(1))
+
+    for name, source in sources.items():
+        page = Paginator(source(), args.posts).get_page(1)
+        timings = {
+            'выборка': lambda: load(source),
+            'рендер': lambda: template.render({'page_obj': page}, request),
+        }
+        results = []
+        for stage, func in timings.items():
+            best = min(repeat(func, number=args.number, repeat=5))
+            results.append(f'{stage} {best / args.number * 1000:.3f} ms')
+        print(f'{name}: ' + ', '.join(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Накладные расходы выборочного профилировщика на запрос.
+
+    python benchmarks/profiler_overhead.py
+    python benchmarks/profiler_overhead.py --interval 0.001
+
+Одна и та же работа (рендер ленты из benchmarks/template_render.py)
+выполняется без профилировщика и под Sampler; печатается замедление
+и доля времени, которую сам сэмплер держал GIL.
+"""
+import argparse
+import os
+import sys
+import threading
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from template_render import page, setup  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--interval', type=float, default=0.005)
+    parser.add_argument('--posts', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    author = setup(args.posts)
+
+    from core.profiling import Sampler
+    from django.template.loader import get_template
+    from django.test import RequestFactory
+    from posts.models import Post
+
+    request = RequestFactory().get('/')
+    request.user = author
+    template = get_template('posts/index.html')
+    context = {'page_obj': page(list(
+        Post.objects.select_related('author', 'group')))}
+
+    def work():
+        for _ in range(args.requests):
+            template.render(context, request)
+
+    work()
+    # Замеры чередуются, чтобы фоновая нагрузка делилась поровну.
+    plain, profiled = [], []
+    for _ in range(args.repeat):
+        plain.append(timed(work))
+        with Sampler(threading.get_ident(), interval=args.interval,
+                     max_samples=10 ** 9) as sampler:
+            profiled.append(timed(work))
+        overhead, samples = sampler.overhead, sampler.samples
+    plain = min(plain)
+    slowdown = (min(profiled) - plain) / plain * 100
+    print(f'интервал {args.interval * 1000:.1f} ms, сэмплов {samples}')
+    print(f'без профилировщика: {plain * 1000:.1f} ms')
+    print(f'с профилировщиком: {min(profiled) * 1000:.1f} ms '
+          f'(+{slowdown:.1f}%)')
+    print(f'время сэмплера: {overhead * 1000:.1f} ms '
+          f'({overhead / min(profiled) * 100:.2f}%)')
+
+
+def timed(function):
+    started = perf_counter()
+    function()
+    return perf_counter() - started
+
+
+if __name__ == '__main__':
+    main()
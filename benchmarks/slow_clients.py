@@ -0,0 +1,106 @@
+"""
+Сравнение WSGI и ASGI под нагрузкой медленных клиентов.
+
+Открывает --clients долгих соединений к потоковому адресу (например,
+/posts/1/events/), медленно читает ответ и параллельно замеряет время
+ответа обычной страницы. Запускать против каждого сервера по очереди:
+
+    gunicorn yatube.wsgi -w 1 --threads 8 -b 127.0.0.1:8000
+    uvicorn yatube.asgi:application --workers 1 --port 8001
+
+    python benchmarks/slow_clients.py http://127.0.0.1:8000/posts/1/events/
+    python benchmarks/slow_clients.py http://127.0.0.1:8001/posts/1/events/
+
+У WSGI число обслуженных медленных клиентов упирается в число потоков,
+а страницы начинают отвечать по таймауту; ASGI держит все соединения.
+Поэтому под WSGI потоки событий сразу отвечают 204: для замера WSGI
+укажите другой долгий адрес.
+"""
+import argparse
+import asyncio
+import statistics
+from time import perf_counter
+from urllib.parse import urlsplit
+
+
+def request_bytes(host, path):
+    return (
+        f'GET {path} HTTP/1.1\r\n'
+        f'Host: {host}\r\n'
+        'Accept: */*\r\n'
+        'Connection: close\r\n\r\n'
+    ).encode()
+
+
+async def slow_client(url, read_rate, header_timeout, served):
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+    writer.write(request_bytes(parts.netloc, parts.path or '/'))
+    await writer.drain()
+    try:
+        status = await asyncio.wait_for(reader.readline(), header_timeout)
+        if b' 200 ' in status:
+            served.append(url)
+        while await reader.read(read_rate):
+            await asyncio.sleep(1)
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def probe(url, timeout):
+    parts = urlsplit(url)
+    started = perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(parts.hostname, parts.port), timeout)
+        writer.write(request_bytes(parts.netloc, parts.path or '/'))
+        await writer.drain()
+        await asyncio.wait_for(reader.read(), timeout)
+        writer.close()
+    except (asyncio.TimeoutError, ConnectionError):
+        return None
+    return perf_counter() - started
+
+
+async def run(args):
+    probe_url = args.probe or args.url.split('/posts/')[0] + '/'
+    served = []
+    clients = [
+        asyncio.ensure_future(slow_client(
+            args.url, args.read_rate, args.header_timeout, served))
+        for _ in range(args.clients)
+    ]
+    await asyncio.sleep(args.header_timeout)
+    latencies = []
+    for _ in range(args.probes):
+        latencies.append(await probe(probe_url, args.probe_timeout))
+    for client in clients:
+        client.cancel()
+    await asyncio.gather(*clients, return_exceptions=True)
+
+    answered = sorted(latency for latency in latencies if latency is not None)
+    print(f'slow clients served: {len(served)}/{args.clients}')
+    print(f'probes answered: {len(answered)}/{args.probes}')
+    if answered:
+        p95 = answered[max(0, int(len(answered) * 0.95) - 1)]
+        print(f'probe p50: {statistics.median(answered) * 1000:.1f} ms')
+        print(f'probe p95: {p95 * 1000:.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('url', help='потоковый адрес для медленных клиентов')
+    parser.add_argument('--probe', help='адрес страницы для замера')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--probes', type=int, default=20)
+    parser.add_argument('--read-rate', type=int, default=16,
+                        help='байт в секунду на медленного клиента')
+    parser.add_argument('--header-timeout', type=float, default=5)
+    parser.add_argument('--probe-timeout', type=float, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Микробенчмарк рендера ленты: время на страницу и на одну запись.
+
+    python benchmarks/template_render.py
+    python benchmarks/template_render.py --template posts/profile.html
+    python benchmarks/template_render.py --engine jinja2
+
+Запросы к БД вынесены за скобки: записи загружаются заранее,
+замеряется только шаблон.
+"""
+import argparse
+import os
+import sys
+from timeit import repeat
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+
+def setup(posts_count):
+    import django
+    django.setup()
+    from django.db import connection
+
+    connection.creation.create_test_db(verbosity=0)
+
+    from posts.models import Group, Post, User
+
+    author = User.objects.create_user(
+        username='author', first_name='Лев', last_name='Толстой')
+    group = Group.objects.create(
+        title='Группа', slug='group', description='Описание')
+    Post.objects.bulk_create(
+        Post(author=author, group=group, text=f'Запись {number} ' * 20)
+        for number in range(posts_count)
+    )
+    return author
+
+
+def page(posts):
+    from django.core.paginator import Paginator
+
+    return Paginator(posts, max(len(posts), 1)).get_page(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--template', default='posts/index.html')
+    parser.add_argument('--engine', default='django',
+                        choices=('django', 'jinja2'))
+    parser.add_argument('--posts', type=int, default=10)
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    author = setup(args.posts)
+
+    from django.template import engines
+    from django.test import RequestFactory
+    from posts.models import Post
+
+    request = RequestFactory().get('/')
+    request.user = author
+    posts = list(Post.objects.select_related('author', 'group'))
+    template = engines[args.engine].get_template(args.template)
+    contexts = {
+        'full': {'page_obj': page(posts), 'author': author},
+        'empty': {'page_obj': page([]), 'author': author},
+    }
+
+    timings = {}
+    for name, context in contexts.items():
+        timings[name] = min(repeat(
+            lambda: template.render(context, request),
+            number=args.number, repeat=5,
+        )) / args.number
+    per_post = (timings['full'] - timings['empty']) / max(args.posts, 1)
+    print(f'{args.template} ({args.engine}), записей: {args.posts}')
+    print(f'страница: {timings["full"] * 1000:.3f} ms')
+    print(f'без записей: {timings["empty"] * 1000:.3f} ms')
+    print(f'на запись: {per_post * 1e6:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
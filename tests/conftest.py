@@ -25,7 +25,7 @@ if FILENAME not in project_dir_content:
 
 from django.utils.version import get_version
 
-assert get_version() < '3.0.0', 'Пожалуйста, используйте версию Django < 3.0.0'
+assert get_version() < '5.0.0', 'Пожалуйста, используйте версию Django < 5.0.0'
 
 from yatube.settings import INSTALLED_APPS
 
@@ -36,4 +36,5 @@ assert any(app in INSTALLED_APPS for app in ['posts.apps.PostsConfig', 'posts'])
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
+    'core.pytest_plugin',
 ]
@@ -0,0 +1,161 @@
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.json', '.xml', '.ico')
+MIN_COMPRESS_SIZE = 256
+BLOCK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Хэширует имена при collectstatic и рядом кладет .gz и,
+    если установлен brotli, .br-версии текстовых файлов.
+    """
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if (hashed_name and not dry_run
+                    and not isinstance(processed, Exception)):
+                self.compress(hashed_name)
+            yield name, hashed_name, processed
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        variants = [('.gz', gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data)))
+        for extension, compressed in variants:
+            if len(compressed) < len(data):
+                with open(path + extension, 'wb') as target:
+                    target.write(compressed)
+
+
+class AssetsMiddleware:
+    """
+    WSGI-обертка, которая отдает статику и медиа мимо Django:
+    с долгим Cache-Control, ETag, сжатыми версиями, Range и
+    wsgi.file_wrapper (sendfile у gunicorn/uwsgi).
+    """
+    def __init__(self, application):
+        self.application = application
+        self.roots = (
+            (settings.STATIC_URL, settings.STATIC_ROOT,
+             settings.STATIC_MAX_AGE),
+            (settings.MEDIA_URL, settings.MEDIA_ROOT,
+             settings.MEDIA_MAX_AGE),
+        )
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        for prefix, root, max_age in self.roots:
+            if root and path.startswith(prefix):
+                return self.serve(
+                    environ, start_response,
+                    root, path[len(prefix):], max_age)
+        return self.application(environ, start_response)
+
+    def serve(self, environ, start_response, root, name, max_age):
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            start_response('405 Method Not Allowed', [('Allow', 'GET, HEAD')])
+            return []
+        root = os.path.realpath(root)
+        path = os.path.realpath(os.path.join(root, name))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            start_response('404 Not Found', [('Content-Type', 'text/plain')])
+            return [b'Not Found']
+
+        content_type, _ = mimetypes.guess_type(path)
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Cache-Control', f'public, max-age={max_age}, immutable'),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        range_header = environ.get('HTTP_RANGE', '')
+        if not range_header:
+            path, encoding = self.negotiate(environ, path)
+            if encoding:
+                headers.append(('Content-Encoding', encoding))
+        stat = os.stat(path)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        headers += [
+            ('ETag', etag),
+            ('Last-Modified', http_date(stat.st_mtime)),
+            ('Accept-Ranges', 'bytes'),
+        ]
+        if etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', headers)
+            return []
+
+        start, end = 0, stat.st_size - 1
+        status = '200 OK'
+        if range_header:
+            byte_range = self.parse_range(range_header, stat.st_size)
+            if byte_range is None:
+                start_response('416 Range Not Satisfiable', [
+                    ('Content-Range', f'bytes */{stat.st_size}')])
+                return []
+            start, end = byte_range
+            status = '206 Partial Content'
+            headers.append(
+                ('Content-Range', f'bytes {start}-{end}/{stat.st_size}'))
+        headers.append(('Content-Length', str(end - start + 1)))
+        start_response(status, headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        source = open(path, 'rb')
+        if status == '200 OK' and 'wsgi.file_wrapper' in environ:
+            return environ['wsgi.file_wrapper'](source, BLOCK_SIZE)
+        return read_range(source, start, end)
+
+    @staticmethod
+    def negotiate(environ, path):
+        accepted = environ.get('HTTP_ACCEPT_ENCODING', '')
+        for encoding, extension in (('br', '.br'), ('gzip', '.gz')):
+            if encoding in accepted and os.path.isfile(path + extension):
+                return path + extension, encoding
+        return path, None
+
+    @staticmethod
+    def parse_range(header, size):
+        match = RANGE_RE.match(header.strip())
+        if not match or match.groups() == ('', ''):
+            return None
+        first, last = match.groups()
+        if not first:
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        if start > end or start >= size:
+            return None
+        return start, end
+
+
+def read_range(source, start, end):
+    with source:
+        source.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = source.read(min(BLOCK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def shared_cache(alias='default'):
+    """Кэш alias общий для процессов, а не LocMemCache."""
+    return not isinstance(caches[alias], LocMemCache)
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который берет пользователя сессии из кэша. Хэш пароля
+    в кэшированной копии по-прежнему сверяется с сессией, а копия
+    удаляется при любом сохранении пользователя. С LocMemCache копия
+    осталась бы в других процессах после блокировки пользователя,
+    поэтому тогда пользователь читается из БД, как в ModelBackend.
+    """
+    def get_user(self, user_id):
+        if not shared_cache():
+            return super().get_user(user_id)
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+
+def invalidate_user(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
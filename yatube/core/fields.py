@@ -0,0 +1,44 @@
+import base64
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+# Управляющий символ в начале: обычный текст с ним тоже сжимается,
+# поэтому разбор значения из БД однозначен.
+COMPRESSED_MARKER = '\x1fz:'
+
+
+def compress_text(value):
+    data = zlib.compress(value.encode(), settings.COMPRESSED_TEXT_LEVEL)
+    return COMPRESSED_MARKER + base64.b64encode(data).decode('ascii')
+
+
+def decompress_text(value):
+    if isinstance(value, str) and value.startswith(COMPRESSED_MARKER):
+        data = base64.b64decode(value[len(COMPRESSED_MARKER):])
+        return zlib.decompress(data).decode()
+    return value
+
+
+def prepare_text(value):
+    """Значение для записи в БД: длинный текст сжимается."""
+    if value is not None and (
+            len(value) >= settings.COMPRESSED_TEXT_THRESHOLD
+            or value.startswith(COMPRESSED_MARKER)):
+        return compress_text(value)
+    return value
+
+
+class CompressedTextField(models.TextField):
+    """
+    TextField, который хранит тексты от COMPRESSED_TEXT_THRESHOLD символов
+    сжатыми zlib (в base64, чтобы колонка осталась текстовой) и
+    распаковывает их при чтении. Точное сравнение работает, поиск по
+    подстроке — только по коротким текстам.
+    """
+    def get_prep_value(self, value):
+        return prepare_text(super().get_prep_value(value))
+
+    def from_db_value(self, value, expression, connection):
+        return decompress_text(value)
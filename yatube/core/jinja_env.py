@@ -0,0 +1,42 @@
+import logging
+
+from core.templatetags.cached_urls import cached_url
+from core.templatetags.user_filters import addclass, follows
+from django.template import defaultfilters
+from django.templatetags.static import static
+from django.utils.timezone import template_localtime
+from jinja2 import Environment
+from sorl.thumbnail.shortcuts import get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+
+def date(value, arg=None):
+    return defaultfilters.date(template_localtime(value), arg)
+
+
+def thumbnail(file_, geometry_string, **options):
+    """Аналог {% thumbnail %}: None вместо исключения, как у тега."""
+    if not file_:
+        return None
+    try:
+        return get_thumbnail(file_, geometry_string, **options)
+    except Exception:
+        logger.exception('Не удалось получить миниатюру %s', file_)
+        return None
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url': cached_url,
+        'thumbnail': thumbnail,
+    })
+    env.filters.update({
+        'addclass': addclass,
+        'date': date,
+        'follows': follows,
+        'truncatechars': defaultfilters.truncatechars,
+    })
+    return env
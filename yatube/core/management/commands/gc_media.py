@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Blob
+from core.storage import collect
+
+
+class Command(BaseCommand):
+    help = 'Удаляет загруженные файлы, на которые не осталось ссылок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=settings.MEDIA_GC_GRACE_HOURS,
+            help='Не трогать файлы, загруженные за это время.',
+        )
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        orphans = Blob.objects.filter(
+            refs=0, touched__lt=cutoff
+        ).order_by('pk').values_list('pk', 'name', 'size')
+        removed = freed = last_pk = 0
+        while True:
+            chunk = list(
+                orphans.filter(pk__gt=last_pk)[:options['chunk_size']])
+            if not chunk:
+                break
+            last_pk = chunk[-1][0]
+            for pk, name, size in chunk:
+                if options['dry_run']:
+                    self.stdout.write(name)
+                elif not collect(name, cutoff):
+                    continue
+                removed += 1
+                freed += size
+        self.stdout.write(
+            f'Удалено файлов: {removed}, освобождено байт: {freed}')
@@ -0,0 +1,96 @@
+import os
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import PROFILE_EXTENSION, make_token
+
+
+def read_profile(path):
+    meta, stacks = {}, Counter()
+    with open(path) as profile:
+        for line in profile:
+            line = line.rstrip('\n')
+            if line.startswith('# '):
+                key, _, value = line[2:].partition(': ')
+                meta[key] = value
+            elif line:
+                stack, _, count = line.rpartition(' ')
+                stacks[stack] += int(count)
+    return meta, stacks
+
+
+class Command(BaseCommand):
+    help = 'Сводит профили запросов по представлениям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=settings.PROFILER_DIR)
+        parser.add_argument('--view', help='Только это представление.')
+        parser.add_argument(
+            '--output',
+            help='Записать общий collapsed-файл для flamegraph/speedscope.')
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument(
+            '--token', action='store_true',
+            help='Напечатать значение заголовка X-Profile и выйти.')
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(make_token())
+            return
+        views = defaultdict(lambda: {
+            'requests': 0, 'duration': 0.0, 'overhead': 0.0,
+            'stacks': Counter(),
+        })
+        directory = options['dir']
+        names = sorted(
+            name for name in os.listdir(directory)
+            if name.endswith(PROFILE_EXTENSION)
+        ) if os.path.isdir(directory) else []
+        for name in names:
+            meta, stacks = read_profile(os.path.join(directory, name))
+            view = meta.get('view', 'unresolved')
+            if options['view'] and view != options['view']:
+                continue
+            summary = views[view]
+            summary['requests'] += 1
+            summary['duration'] += float(meta.get('duration', 0))
+            summary['overhead'] += float(meta.get('overhead', 0))
+            summary['stacks'].update(stacks)
+        if not views:
+            self.stdout.write('Профилей нет.')
+            return
+
+        for view, summary in sorted(
+                views.items(), key=lambda item: -item[1]['duration']):
+            self.write_summary(view, summary, options['top'])
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                for view, summary in views.items():
+                    for stack, count in summary['stacks'].items():
+                        output.write(f'{view};{stack} {count}\n')
+            self.stdout.write(f'Записано в {options["output"]}')
+
+    def write_summary(self, view, summary, top):
+        stacks = summary['stacks']
+        samples = sum(stacks.values())
+        requests = summary['requests']
+        duration = max(summary['duration'], 1e-9)
+        self.stdout.write(
+            f'{view}: запросов {requests}, '
+            f'в среднем {duration / requests * 1000:.1f} ms, '
+            f'сэмплов {samples}, накладные расходы '
+            f'{summary["overhead"] / duration * 100:.2f}%')
+        own, total = Counter(), Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        for title, counter in (
+                ('собственное', own), ('с вложенными', total)):
+            self.stdout.write(f'  {title} время:')
+            for frame, count in counter.most_common(top):
+                self.stdout.write(
+                    f'    {count / samples * 100:5.1f}%  {frame}')
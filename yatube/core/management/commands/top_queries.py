@@ -0,0 +1,106 @@
+import json
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from core.queries import is_read
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def read_stats(directory):
+    """Сводит файлы процессов: суммы, выборки длительностей и views."""
+    queries = {}
+    names = sorted(
+        name for name in os.listdir(directory) if name.endswith('.json')
+    ) if os.path.isdir(directory) else []
+    for name in names:
+        with open(os.path.join(directory, name)) as stats:
+            data = json.load(stats)
+        for key, entry in data.items():
+            merged = queries.setdefault(key, {
+                'sql': entry['sql'], 'count': 0, 'total': 0.0,
+                'durations': [], 'views': Counter(),
+                'sample': entry['sample'],
+            })
+            merged['count'] += entry['count']
+            merged['total'] += entry['total']
+            merged['durations'].extend(entry['durations'])
+            merged['views'].update(entry['views'])
+    for entry in queries.values():
+        entry['p95'] = percentile(entry['durations'], 0.95)
+    return queries
+
+
+class Command(BaseCommand):
+    help = 'Самые тяжелые виды запросов к БД с планом выполнения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=settings.QUERY_STATS_DIR)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--sort', default='total', choices=('total', 'p95', 'count'))
+        parser.add_argument(
+            '--no-explain', action='store_true',
+            help='Не выполнять EXPLAIN для примеров.')
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Удалить накопленную статистику после вывода.')
+
+    def handle(self, *args, **options):
+        directory = options['dir']
+        queries = read_stats(directory)
+        if not queries:
+            self.stdout.write('Статистики нет.')
+            return
+        top = sorted(
+            queries.items(), key=lambda item: -item[1][options['sort']]
+        )[:options['limit']]
+        for key, entry in top:
+            self.write_entry(key, entry)
+            if not options['no_explain']:
+                self.write_explain(entry['sample'])
+        if options['reset']:
+            for name in os.listdir(directory):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(directory, name))
+
+    def write_entry(self, key, entry):
+        count = entry['count']
+        views = ', '.join(
+            f'{view} ({number})'
+            for view, number in entry['views'].most_common(3))
+        self.stdout.write(
+            f'{key}: выполнений {count}, '
+            f'всего {entry["total"] * 1000:.1f} ms, '
+            f'в среднем {entry["total"] / count * 1000:.2f} ms, '
+            f'p95 {entry["p95"] * 1000:.2f} ms')
+        self.stdout.write(f'  представления: {views}')
+        self.stdout.write(f'  {entry["sql"]}')
+
+    def write_explain(self, sql):
+        # План строится только для чтений: EXPLAIN записи ее не выполняет
+        # не во всех СУБД. Параметры не сохраняются, вместо них NULL.
+        if not is_read(sql):
+            return
+        params = [None] * sql.count('%s')
+        prefix = connection.ops.explain_query_prefix()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                rows = cursor.fetchall()
+        except DatabaseError as error:
+            self.stdout.write(f'  EXPLAIN не удался: {error}')
+            return
+        self.stdout.write('  EXPLAIN:')
+        for row in rows:
+            self.stdout.write(
+                '    ' + ' '.join(str(column) for column in row))
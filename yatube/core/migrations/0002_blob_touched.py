@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:07
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def touch_from_created(apps, schema_editor):
+    Blob = apps.get_model('core', 'Blob')
+    Blob.objects.update(touched=F('created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_blob'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='blob',
+            name='core_blob_refs_22924a_idx',
+        ),
+        migrations.AddField(
+            model_name='blob',
+            name='touched',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Последняя загрузка'),
+        ),
+        migrations.AddIndex(
+            model_name='blob',
+            index=models.Index(fields=['refs', 'touched'], name='core_blob_refs_a200b1_idx'),
+        ),
+        migrations.RunPython(touch_from_created, migrations.RunPython.noop),
+    ]
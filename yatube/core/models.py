@@ -0,0 +1,23 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Blob(models.Model):
+    name = models.CharField('Путь файла', max_length=255, unique=True)
+    size = models.PositiveBigIntegerField('Размер', default=0)
+    refs = models.PositiveIntegerField('Число ссылок', default=0)
+    created = models.DateTimeField('Дата загрузки', auto_now_add=True)
+    # Сдвигается при каждой загрузке того же содержимого: ссылка на файл
+    # появится только после сохранения записи, и до тех пор сборщик
+    # не должен трогать файл.
+    touched = models.DateTimeField('Последняя загрузка', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Файл'
+        verbose_name_plural = 'Файлы'
+        indexes = (
+            models.Index(fields=('refs', 'touched')),
+        )
+
+    def __str__(self):
+        return self.name
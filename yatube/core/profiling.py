@@ -0,0 +1,163 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from django.core import signing
+
+TOKEN_SALT = 'core.profiling'
+TOKEN_VALUE = 'profile'
+PROFILE_EXTENSION = '.folded'
+
+
+def make_token():
+    """Значение заголовка X-Profile: профилировать запрос вне выборки."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(TOKEN_VALUE)
+
+
+def token_valid(token):
+    try:
+        value = signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILER_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return value == TOKEN_VALUE
+
+
+def frame_name(frame):
+    code = frame.f_code
+    module = frame.f_globals.get('__name__', '?')
+    return f'{module}:{getattr(code, "co_qualname", code.co_name)}'
+
+
+def collapse(frame):
+    """Стек в формате collapsed: от корня к листу через ';'."""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names)).replace(' ', '_')
+
+
+class Sampler:
+    """
+    Раз в interval секунд снимает стек потока thread_id. Накладные
+    расходы ограничены частотой и max_samples и замеряются в overhead.
+    """
+    def __init__(self, thread_id, interval=None, max_samples=None):
+        self.thread_id = thread_id
+        self.interval = interval or settings.PROFILER_INTERVAL
+        self.max_samples = max_samples or settings.PROFILER_MAX_SAMPLES
+        self.stacks = Counter()
+        self.samples = 0
+        self.overhead = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self.run, name='profiler', daemon=True)
+
+    def run(self):
+        while (not self._stop.wait(self.interval)
+               and self.samples < self.max_samples):
+            started = time.perf_counter()
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+                self.samples += 1
+            del frame
+            self.overhead += time.perf_counter() - started
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+def write_profile(request, sampler):
+    directory = settings.PROFILER_DIR
+    os.makedirs(directory, exist_ok=True)
+    view = view_name(request)
+    # Имена сортируются по времени, pid и поток исключают совпадения.
+    name = '{}-{}-{}-{}{}'.format(
+        time.time_ns(), os.getpid(), threading.get_ident(),
+        view.replace(':', '.'), PROFILE_EXTENSION)
+    with open(os.path.join(directory, name), 'w') as profile:
+        profile.write(
+            f'# view: {view}\n'
+            f'# path: {request.path}\n'
+            f'# duration: {sampler.duration:.6f}\n'
+            f'# overhead: {sampler.overhead:.6f}\n'
+            f'# samples: {sampler.samples}\n')
+        for stack, count in sampler.stacks.most_common():
+            profile.write(f'{stack} {count}\n')
+    rotate(directory, settings.PROFILER_MAX_FILES)
+
+
+def rotate(directory, keep):
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.endswith(PROFILE_EXTENSION))
+    for name in names[:-keep or None]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+class ProfilerMiddleware:
+    """
+    Профилирует долю PROFILER_SAMPLE_RATE запросов и запросы с
+    подписанным заголовком X-Profile (manage.py merge_profiles --token).
+    Под ASGI снимается стек потока, в котором sync_to_async выполняет ORM
+    и шаблоны запроса: поток событий общий для всех запросов. Код самих
+    корутин в такой профиль не попадает.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def sampled(request):
+        rate = settings.PROFILER_SAMPLE_RATE
+        if rate and random.random() < rate:
+            return True
+        token = request.headers.get('X-Profile')
+        return bool(token) and token_valid(token)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled(request):
+            return self.get_response(request)
+        with Sampler(threading.get_ident()) as sampler:
+            response = self.get_response(request)
+        write_profile(request, sampler)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled(request):
+            return await self.get_response(request)
+        # Поток thread_sensitive-исполнителя контекста запроса.
+        thread_id = await sync_to_async(threading.get_ident)()
+        with Sampler(thread_id) as sampler:
+            response = await self.get_response(request)
+        write_profile(request, sampler)
+        return response
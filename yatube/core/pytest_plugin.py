@@ -0,0 +1,28 @@
+"""
+Плагин pytest: каждый запрос тестового клиента проверяется на N+1 и на
+бюджет запросов из QUERY_BUDGETS. Подключается через pytest_plugins.
+"""
+import pytest
+from core import queries
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'no_query_budget: не проверять запросы к БД в тесте')
+
+
+@pytest.fixture
+def query_budget():
+    """with query_budget(5): ... — не больше 5 запросов и без N+1."""
+    return queries.query_budget
+
+
+@pytest.fixture(autouse=True)
+def request_query_budgets(request):
+    if request.node.get_closest_marker('no_query_budget'):
+        yield None
+        return
+    with queries.RequestQueryRecorder() as recorder:
+        yield recorder
+    if recorder.violations:
+        pytest.fail('\n\n'.join(recorder.violations), pytrace=False)
@@ -0,0 +1,161 @@
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.urls import Resolver404, resolve
+
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+SPACES_RE = re.compile(r'\s+')
+
+
+def query_shape(sql):
+    """
+    Вид запроса без значений: параметры Django и так передает отдельно,
+    остается схлопнуть списки IN (%s, %s, ...) разной длины.
+    """
+    return IN_LIST_RE.sub('IN (...)', SPACES_RE.sub(' ', sql).strip())
+
+
+def is_read(sql):
+    return sql.lstrip()[:6].upper() == 'SELECT'
+
+
+class QueryLog:
+    """
+    Записывает запросы текущего соединения, не требуя DEBUG. Бюджет и
+    повторы считаются по чтениям: записи на GET-страницах — разовая цена
+    вроде метаданных sorl при первой отрисовке миниатюр.
+    """
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def reads(self):
+        return [sql for sql in self.queries if is_read(sql)]
+
+    def repeats(self, threshold=None):
+        """Виды запросов, выполненные threshold раз и больше: N+1."""
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        shapes = Counter(query_shape(sql) for sql in self.reads)
+        return {
+            shape: count for shape, count in shapes.items()
+            if count >= threshold
+        }
+
+    def problems(self, budget=None, threshold=None):
+        problems = []
+        reads = len(self.reads)
+        if budget is not None and reads > budget:
+            problems.append(f'{reads} чтений при бюджете {budget}')
+        for shape, count in self.repeats(threshold).items():
+            problems.append(f'N+1, {count} раз: {shape}')
+        return problems
+
+    def report(self, problems):
+        queries = '\n'.join(
+            f'{number}. {sql}'
+            for number, sql in enumerate(self.queries, start=1))
+        return '\n'.join(problems) + '\nЗапросы:\n' + queries
+
+
+@contextmanager
+def query_budget(budget=None, threshold=None):
+    """
+    Проверяет, что в блоке не больше budget запросов и нет повторов
+    одного вида запроса (N+1).
+    """
+    with QueryLog() as log:
+        yield log
+    problems = log.problems(budget, threshold)
+    if problems:
+        raise AssertionError(log.report(problems))
+
+
+class QueryBudgetMixin:
+    """Для TestCase: self.assertQueryBudget(...) вокруг запроса к странице."""
+    def assertQueryBudget(self, budget=None, threshold=None):
+        return query_budget(budget, threshold)
+
+
+def view_name(path):
+    try:
+        return resolve(path).view_name
+    except Resolver404:
+        return None
+
+
+class RequestQueryRecorder:
+    """
+    Считает запросы к БД для каждого HTTP-запроса тестового клиента и
+    сверяет их с QUERY_BUDGETS по имени представления.
+    """
+    def __init__(self, budgets=None, threshold=None):
+        self.budgets = (
+            settings.QUERY_BUDGETS if budgets is None else budgets)
+        self.threshold = threshold
+        self.violations = []
+        self._local = threading.local()
+
+    def __call__(self, execute, sql, params, many, context):
+        log = getattr(self._local, 'log', None)
+        if log is not None:
+            log.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def started(self, environ=None, scope=None, **kwargs):
+        if environ is not None:
+            path = environ.get('PATH_INFO', '')
+            method = environ.get('REQUEST_METHOD', 'GET')
+        else:
+            path = scope.get('path', '')
+            method = scope.get('method', 'GET')
+        self._local.path = path
+        self._local.method = method
+        self._local.log = QueryLog()
+
+    def finished(self, **kwargs):
+        log = getattr(self._local, 'log', None)
+        if log is None:
+            return
+        self._local.log = None
+        name = view_name(self._local.path)
+        # Бюджеты заданы для чтения страниц, запись проверяется только на N+1.
+        budget = None
+        if self._local.method in ('GET', 'HEAD'):
+            budget = self.budgets.get(name)
+        problems = log.problems(budget, self.threshold)
+        if problems:
+            self.violations.append(
+                f'{self._local.method} {self._local.path} ({name}):\n'
+                + log.report(problems))
+
+    def __enter__(self):
+        request_started.connect(self.started)
+        request_finished.connect(self.finished)
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+        request_started.disconnect(self.started)
+        request_finished.disconnect(self.finished)
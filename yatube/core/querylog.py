@@ -0,0 +1,169 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from core.queries import query_shape
+
+logger = logging.getLogger('yatube.slow_queries')
+
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+current_view = ContextVar('current_view', default=None)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    Отпечаток запроса: литералы и параметры заменены на %s, списки IN
+    схлопнуты. Возвращает (хэш, нормализованный текст).
+    """
+    normalized = query_shape(LITERAL_RE.sub('%s', sql))
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16], normalized
+
+
+class QueryStats:
+    """
+    Счетчики процесса по отпечаткам: число, суммарное время, выборка
+    длительностей для p95, представления и пример запроса для EXPLAIN.
+    Параметры запросов не сохраняются: в них бывают ключи сессий и хэши
+    паролей.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.queries = {}
+            self.flushed = time.monotonic()
+
+    def record(self, sql, duration, view):
+        key, normalized = fingerprint(sql)
+        with self._lock:
+            entry = self.queries.get(key)
+            if entry is None:
+                entry = self.queries[key] = {
+                    'sql': normalized, 'count': 0, 'total': 0.0,
+                    'durations': [], 'views': Counter(),
+                    'sample': sql,
+                }
+            entry['count'] += 1
+            entry['total'] += duration
+            entry['views'][view or '-'] += 1
+            # Выборка ограниченного размера с равной вероятностью
+            # для каждого выполнения (reservoir sampling).
+            durations = entry['durations']
+            if len(durations) < settings.QUERY_STATS_SAMPLES:
+                durations.append(duration)
+            else:
+                index = random.randrange(entry['count'])
+                if index < len(durations):
+                    durations[index] = duration
+
+    def flush(self, force=False):
+        """Переписывает файл процесса в QUERY_STATS_DIR раз в интервал."""
+        now = time.monotonic()
+        if not force and now - self.flushed < settings.QUERY_STATS_INTERVAL:
+            return
+        with self._lock:
+            self.flushed = now
+            data = {
+                key: {
+                    **entry,
+                    'durations': list(entry['durations']),
+                    'views': dict(entry['views']),
+                }
+                for key, entry in self.queries.items()
+            }
+        directory = settings.QUERY_STATS_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(
+            directory, f'{socket.gethostname()}-{os.getpid()}.json')
+        with open(path + '.tmp', 'w') as stats:
+            json.dump(data, stats)
+        os.replace(path + '.tmp', path)
+
+
+query_stats = QueryStats()
+
+
+def execute_hook(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        view = current_view.get()
+        query_stats.record(sql, duration, view)
+        if duration >= settings.SLOW_QUERY_THRESHOLD:
+            key, normalized = fingerprint(sql)
+            logger.warning('slow query', extra={
+                'fingerprint': key,
+                'duration_ms': round(duration * 1000, 3),
+                'view': view,
+                'sql': normalized,
+            })
+
+
+def install_hook(sender, connection, **kwargs):
+    if execute_hook not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_hook)
+
+
+class JsonFormatter(logging.Formatter):
+    """Строка JSON на запись: поля из extra плюс время и сообщение."""
+    fields = ('fingerprint', 'duration_ms', 'view', 'sql')
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        for field in self.fields:
+            if hasattr(record, field):
+                data[field] = getattr(record, field)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class QueryStatsMiddleware:
+    """Запоминает представление для отпечатков и сбрасывает статистику."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = current_view.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+            query_stats.flush()
+
+    async def __acall__(self, request):
+        token = current_view.set(None)
+        try:
+            return await self.get_response(request)
+        finally:
+            current_view.reset(token)
+            query_stats.flush()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(request.resolver_match.view_name)
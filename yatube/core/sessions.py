@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+from .auth import shared_cache
+
+
+class SessionStore(cached_db.SessionStore):
+    """
+    cached_db, если кэш сессий общий для процессов, иначе db. Копия в
+    LocMemCache пережила бы выход в другом процессе: там cookie
+    принимался бы до конца срока сессии.
+    """
+    def cached(self):
+        return shared_cache(settings.SESSION_CACHE_ALIAS)
+
+    def load(self):
+        if self.cached():
+            return super().load()
+        return DBStore.load(self)
+
+    def exists(self, session_key):
+        if self.cached():
+            return super().exists(session_key)
+        return DBStore.exists(self, session_key)
+
+    def save(self, must_create=False):
+        if self.cached():
+            return super().save(must_create)
+        return DBStore.save(self, must_create)
+
+    def delete(self, session_key=None):
+        if self.cached():
+            return super().delete(session_key)
+        return DBStore.delete(self, session_key)
@@ -0,0 +1,130 @@
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from .models import Blob
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранит файлы под sha256 содержимого: одинаковые загрузки
+    ложатся в один файл, каталоги разбиты по первым байтам хэша.
+    Ссылки на файл считаются в Blob (см. track_references),
+    файлы без ссылок удаляет manage.py gc_media.
+    """
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        name = os.path.join(
+            os.path.dirname(name),
+            digest[:2], digest[2:4], digest + extension,
+        ).replace('\\', '/')
+        # Отметка ставится до записи файла и отдельно от ссылки, которая
+        # появится позже в post_save: collect пропускает свежие файлы.
+        touched = Blob.objects.filter(name=name).update(
+            touched=timezone.now())
+        if not touched:
+            Blob.objects.get_or_create(
+                name=name, defaults={'size': content.size})
+        if not self.exists(name):
+            content.seek(0)
+            try:
+                super()._save(name, content)
+            except FileExistsError:
+                pass
+        return name
+
+
+def variant_name(name, suffix):
+    """
+    Имя производного файла (нарезки) для файла name: у
+    posts/ab/cd/<hash>.jpg это posts/variants/ab/cd/<hash>-<suffix>.
+    Нарезки лежат в тех же шардах, что и файлы, и удаляются в collect.
+    """
+    top, _, path = name.partition('/')
+    return f'{top}/variants/{os.path.splitext(path)[0]}-{suffix}'
+
+
+def variant_names(name):
+    """Производные файлы name, которые есть в хранилище."""
+    directory, prefix = variant_name(name, '').rsplit('/', 1)
+    try:
+        _, files = ContentAddressedStorage().listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [
+        f'{directory}/{file}' for file in files if file.startswith(prefix)]
+
+
+def file_name(instance, field_name):
+    value = instance.__dict__.get(field_name)
+    return getattr(value, 'name', value) or ''
+
+
+def track_references(model, field_name):
+    """Поддерживает Blob.refs для файлового поля модели."""
+    attr = f'_{field_name}_blob'
+    uid = f'{model._meta.label}.{field_name}'
+
+    def remember(sender, instance, **kwargs):
+        if field_name in instance.__dict__:
+            setattr(instance, attr, file_name(instance, field_name))
+
+    def update(sender, instance, **kwargs):
+        if field_name not in instance.__dict__:
+            return
+        old = getattr(instance, attr, '')
+        new = file_name(instance, field_name)
+        if old == new:
+            return
+        if new:
+            Blob.objects.filter(name=new).update(refs=F('refs') + 1)
+        if old:
+            Blob.objects.filter(name=old, refs__gt=0).update(
+                refs=F('refs') - 1)
+        setattr(instance, attr, new)
+
+    def release(sender, instance, **kwargs):
+        name = getattr(instance, attr, '')
+        if name:
+            Blob.objects.filter(name=name, refs__gt=0).update(
+                refs=F('refs') - 1)
+
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(update, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(release, sender=model, weak=False, dispatch_uid=uid)
+
+
+def collect(name, touched_before=None):
+    """
+    Удаляет файл вместе с нарезками, если на него не осталось ссылок и
+    то же содержимое не загружали после touched_before (по умолчанию —
+    последние MEDIA_UPLOAD_GRACE секунд): такая загрузка еще сошлется на
+    файл.
+    """
+    if touched_before is None:
+        touched_before = timezone.now() - timedelta(
+            seconds=settings.MEDIA_UPLOAD_GRACE)
+    with transaction.atomic():
+        deleted, _ = Blob.objects.filter(
+            name=name, refs=0, touched__lt=touched_before).delete()
+        if deleted:
+            storage = ContentAddressedStorage()
+            for variant in [*variant_names(name), name]:
+                storage.delete(variant)
+    return bool(deleted)
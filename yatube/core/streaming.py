@@ -0,0 +1,61 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.template.backends.utils import csrf_input_lazy, csrf_token_lazy
+from django.template.loader import get_template
+
+FLUSH_MARKER = '<!-- flush -->'
+
+
+def stream_template(template_name, context=None, request=None, using=None):
+    """
+    Отдает страницу кусками по мере рендера. Кусок уходит, когда в шаблоне
+    встречается <!-- flush --> или набралось STREAM_CHUNK_SIZE символов.
+    Шаблоны Django генерировать не умеют и отдаются одним куском.
+    """
+    template = get_template(template_name, using=using)
+    if not hasattr(template.template, 'generate'):
+        yield template.render(context, request)
+        return
+    context = dict(context or {})
+    if request is not None:
+        # То же, что делает Template.render бэкенда Jinja2.
+        context['request'] = request
+        context['csrf_input'] = csrf_input_lazy(request)
+        context['csrf_token'] = csrf_token_lazy(request)
+        for processor in template.backend.template_context_processors:
+            context.update(processor(request))
+    buffer, size = [], 0
+    for piece in template.template.generate(context):
+        flush = FLUSH_MARKER in piece
+        if flush:
+            piece = piece.replace(FLUSH_MARKER, '')
+        buffer.append(piece)
+        size += len(piece)
+        if flush or size >= settings.STREAM_CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+async def aiterate(iterator):
+    # Рендер ходит в БД, поэтому куски берутся в общем sync-потоке.
+    next_chunk = sync_to_async(next)
+    while True:
+        chunk = await next_chunk(iterator, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def stream_render(request, template_name, context=None, using=None):
+    """Потоковый аналог render()."""
+    stream = stream_template(template_name, context, request, using)
+    # Синхронный итератор под ASGI Django сначала собрал бы целиком.
+    if isinstance(request, ASGIRequest):
+        stream = aiterate(stream)
+    response = StreamingHttpResponse(stream)
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,28 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_script_prefix, get_urlconf, reverse
+
+register = template.Library()
+
+
+@lru_cache(maxsize=settings.URL_CACHE_SIZE)
+def cached_reverse(prefix, urlconf, viewname, args):
+    return reverse(viewname, urlconf=urlconf, args=args)
+
+
+@register.simple_tag
+def cached_url(viewname, *args):
+    """{% url %} с памятью: адреса зависят только от имени и аргументов."""
+    return cached_reverse(
+        get_script_prefix(), get_urlconf(), viewname,
+        tuple(str(arg) for arg in args))
+
+
+@receiver(setting_changed)
+def clear_cached_urls(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        cached_reverse.cache_clear()
@@ -0,0 +1,13 @@
+from django import template
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/picture.html')
+def picture(post):
+    """
+    Картинка записи из includes/picture.html. В отличие от {% include %}
+    шаблон ищется и компилируется один раз на узел, а не на каждую
+    запись ленты.
+    """
+    return {'post': post}
@@ -1,4 +1,5 @@
 from django import template
+from posts.following import is_following
 
 register = template.Library()
 
@@ -6,3 +7,9 @@ register = template.Library()
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+@register.filter
+def follows(user, author):
+    """{% if user|follows:post.author %} без запроса на каждую проверку."""
+    return is_following(user, author)
@@ -0,0 +1,13 @@
+import asyncio
+
+from asgiref.sync import SyncToAsync
+from django.core.handlers.asgi import ASGIHandler
+from django.test import SimpleTestCase
+
+
+class AsgiChainTest(SimpleTestCase):
+    def test_middleware_chain_async(self):
+        """Цепочка middleware под ASGI не уходит в поток"""
+        chain = ASGIHandler()._middleware_chain
+        self.assertNotIsInstance(chain, SyncToAsync)
+        self.assertTrue(asyncio.iscoroutinefunction(chain))
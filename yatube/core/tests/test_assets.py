@@ -0,0 +1,103 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from core.assets import AssetsMiddleware, CompressedManifestStaticFilesStorage
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+TEMP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+STATIC_ROOT = os.path.join(TEMP_ROOT, 'static')
+MEDIA_ROOT = os.path.join(TEMP_ROOT, 'media')
+CSS = b'body { color: red; }\n' * 50
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT, MEDIA_ROOT=MEDIA_ROOT)
+class AssetsMiddlewareTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(STATIC_ROOT, 'css'))
+        os.makedirs(MEDIA_ROOT)
+        with open(os.path.join(STATIC_ROOT, 'css', 'site.css'), 'wb') as f:
+            f.write(CSS)
+        with open(os.path.join(STATIC_ROOT, 'css', 'site.css.gz'),
+                  'wb') as f:
+            f.write(gzip.compress(CSS))
+        with open(os.path.join(MEDIA_ROOT, 'secret.txt'), 'w') as f:
+            f.write('media')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_ROOT, ignore_errors=True)
+
+    def request(self, path, **headers):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **headers}
+        result = {}
+
+        def start_response(status, response_headers):
+            result['status'] = status
+            result['headers'] = dict(response_headers)
+
+        def application(environ, start_response):
+            start_response('200 OK', [])
+            return [b'django']
+
+        body = b''.join(AssetsMiddleware(application)(
+            environ, start_response))
+        return result['status'], result['headers'], body
+
+    def test_static_served_with_cache_headers(self):
+        """Статика отдается с долгим кэшем и ETag"""
+        status, headers, body = self.request('/static/css/site.css')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, CSS)
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(headers['Content-Type'], 'text/css')
+        status, _, body = self.request(
+            '/static/css/site.css', HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_precompressed_variant(self):
+        """При Accept-Encoding: gzip отдается готовый .gz"""
+        _, headers, body = self.request(
+            '/static/css/site.css', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_range_request(self):
+        """Range отдает часть файла"""
+        status, headers, body = self.request(
+            '/static/css/site.css', HTTP_RANGE='bytes=5-9')
+        self.assertEqual(status, '206 Partial Content')
+        self.assertEqual(body, CSS[5:10])
+        self.assertEqual(
+            headers['Content-Range'], f'bytes 5-9/{len(CSS)}')
+        status, _, _ = self.request(
+            '/static/css/site.css', HTTP_RANGE=f'bytes={len(CSS)}-')
+        self.assertEqual(status, '416 Range Not Satisfiable')
+
+    def test_other_paths_and_traversal(self):
+        """Прочие адреса уходят в Django, выход из каталога запрещен"""
+        status, _, body = self.request('/posts/1/')
+        self.assertEqual(body, b'django')
+        status, _, _ = self.request('/static/../media/secret.txt')
+        self.assertEqual(status, '404 Not Found')
+        _, _, body = self.request('/media/secret.txt')
+        self.assertEqual(body, b'media')
+
+
+class CompressedStorageTest(SimpleTestCase):
+    def test_compress_writes_gzip(self):
+        """collectstatic кладет рядом сжатую версию"""
+        location = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        storage = CompressedManifestStaticFilesStorage(location=location)
+        with open(os.path.join(location, 'site.css'), 'wb') as f:
+            f.write(CSS)
+        storage.compress('site.css')
+        with open(os.path.join(location, 'site.css.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), CSS)
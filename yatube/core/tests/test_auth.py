@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+
+from core.auth import user_cache_key
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import KEY_PREFIX
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import User
+
+CACHE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': CACHE_DIR,
+}})
+class CachedUserTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', password='old-password')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('posts:fragments')
+
+    def test_warm_request_without_queries(self):
+        """Сессия и пользователь берутся из кэша"""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertIn('reader', response.json()['nav'])
+
+    def test_user_saved_invalidates_cache(self):
+        self.client.get(self.url)
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertIn('renamed', self.client.get(self.url).json()['nav'])
+
+    def test_password_change_logs_out(self):
+        """Копия в кэше не отменяет проверку хэша пароля в сессии"""
+        self.client.get(self.url)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        nav = self.client.get(self.url).json()['nav']
+        self.assertNotIn('reader', nav)
+
+    def test_logout_removes_shared_session(self):
+        """После выхода сессии нет и в кэше другого процесса"""
+        self.client.get(self.url)
+        key = KEY_PREFIX + self.client.session.session_key
+        other = caches.create_connection('default')
+        self.assertIsNotNone(other.get(key))
+        self.client.post(reverse('users:logout'))
+        self.assertIsNone(other.get(key))
+
+    def test_inactive_user_rejected(self):
+        self.client.get(self.url)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.set(
+            user_cache_key(self.user.pk),
+            User.objects.get(pk=self.user.pk))
+        self.assertNotIn('reader', self.client.get(self.url).json()['nav'])
+
+
+class LocalCacheUserTest(TestCase):
+    def test_user_not_cached_per_process(self):
+        """С LocMemCache пользователь читается из БД"""
+        user = User.objects.create_user(username='reader')
+        cache.clear()
+        self.client.force_login(user)
+        self.client.get(reverse('posts:fragments'))
+        self.assertIsNone(cache.get(user_cache_key(user.pk)))
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        nav = self.client.get(reverse('posts:fragments')).json()['nav']
+        self.assertNotIn('reader', nav)
+
+    def test_session_not_cached_per_process(self):
+        """С LocMemCache сессия живет только в БД"""
+        user = User.objects.create_user(username='reader')
+        self.client.force_login(user)
+        session_key = self.client.session.session_key
+        self.assertIsNone(cache.get(KEY_PREFIX + session_key))
+        Session.objects.filter(session_key=session_key).delete()
+        nav = self.client.get(reverse('posts:fragments')).json()['nav']
+        self.assertNotIn('reader', nav)
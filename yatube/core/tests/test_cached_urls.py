@@ -0,0 +1,17 @@
+from core.templatetags.cached_urls import cached_reverse, cached_url
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+
+class CachedUrlTest(SimpleTestCase):
+    def test_cached_url_matches_reverse(self):
+        """Запомненный адрес совпадает с reverse"""
+        cached_reverse.cache_clear()
+        self.assertEqual(
+            cached_url('posts:profile', 'auth'),
+            reverse('posts:profile', args=('auth',)))
+        self.assertEqual(
+            cached_url('posts:post_detail', 1),
+            reverse('posts:post_detail', args=(1,)))
+        cached_url('posts:post_detail', 1)
+        self.assertEqual(cached_reverse.cache_info().hits, 1)
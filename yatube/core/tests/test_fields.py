@@ -0,0 +1,145 @@
+from core.fields import COMPRESSED_MARKER
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import fields
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from posts.archive import archive_batch
+from posts.forms import PostForm
+from posts.models import (ArchivedComment, ArchivedPost, Comment,
+                          CommentBody, Group, Post, PostBody, User)
+
+
+def raw_text(model, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT text FROM {model._meta.db_table} '
+            f'WHERE {model._meta.pk.column} = %s', [pk])
+        return cursor.fetchone()[0]
+
+
+@override_settings(COMPRESSED_TEXT_THRESHOLD=100)
+class CompressedTextFieldTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+
+    def archive(self, text):
+        return ArchivedPost.objects.create(
+            author=self.user, text=text, pub_date=timezone.now())
+
+    def test_long_text_stored_compressed(self):
+        """Длинный текст хранится сжатым и читается как был"""
+        text = 'Длинная запись. ' * 200
+        post = self.archive(text)
+        comment = ArchivedComment.objects.create(
+            author=self.user, post=post, text=text, created=timezone.now())
+        for model, pk in ((ArchivedPost, post.pk),
+                          (ArchivedComment, comment.pk)):
+            with self.subTest(model=model.__name__):
+                raw = raw_text(model, pk)
+                self.assertTrue(raw.startswith(COMPRESSED_MARKER))
+                self.assertLess(len(raw), len(text) / 10)
+                self.assertEqual(model.objects.get(pk=pk).text, text)
+                self.assertEqual(
+                    model.objects.values_list('text', flat=True).get(
+                        pk=pk), text)
+        self.assertEqual(ArchivedPost.objects.filter(text=text).get(), post)
+
+    def test_short_text_stored_as_is(self):
+        post = self.archive('Коротко')
+        self.assertEqual(raw_text(ArchivedPost, post.pk), 'Коротко')
+        self.assertTrue(
+            ArchivedPost.objects.filter(text__contains='орот').exists())
+
+    def test_marker_in_short_text(self):
+        """Текст, похожий на сжатый, не путается со сжатым"""
+        text = COMPRESSED_MARKER + 'abc'
+        post = self.archive(text)
+        self.assertEqual(ArchivedPost.objects.get(pk=post.pk).text, text)
+
+
+@override_settings(COMPRESSED_TEXT_THRESHOLD=100)
+class LongTextTest(TestCase):
+    TEXT = 'Длинная запись. ' * 200
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(author=cls.user, text=cls.TEXT)
+        cls.comment = Comment.objects.create(
+            author=cls.user, post=cls.post, text=cls.TEXT)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_long_text_compressed_in_body(self):
+        """В строке записи начало текста, полный текст сжат в body"""
+        self.assertEqual(type(Post._meta.get_field('text')),
+                         fields.TextField)
+        self.assertEqual(type(Comment._meta.get_field('text')),
+                         fields.TextField)
+        for model, body_model, pk in (
+                (Post, PostBody, self.post.pk),
+                (Comment, CommentBody, self.comment.pk)):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(raw_text(model, pk), self.TEXT[:100])
+                raw = raw_text(body_model, pk)
+                self.assertTrue(raw.startswith(COMPRESSED_MARKER))
+                self.assertLess(len(raw), len(self.TEXT) / 10)
+                obj = model.objects.get(pk=pk)
+                self.assertTrue(obj.long_text)
+                self.assertEqual(obj.text, self.TEXT[:100])
+                self.assertEqual(obj.full_text, self.TEXT)
+
+    def test_short_text_stays_in_row(self):
+        post = Post.objects.create(author=self.user, text='Коротко')
+        self.assertFalse(Post.objects.get(pk=post.pk).long_text)
+        self.assertEqual(raw_text(Post, post.pk), 'Коротко')
+        self.assertFalse(PostBody.objects.filter(pk=post.pk).exists())
+
+    def test_save_without_new_text_keeps_body(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.group
+        post.save()
+        self.assertEqual(PostBody.objects.get(pk=post.pk).text, self.TEXT)
+
+    def test_shortened_text_drops_body(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Коротко'
+        post.save()
+        post = Post.objects.get(pk=post.pk)
+        self.assertFalse(post.long_text)
+        self.assertEqual(post.full_text, 'Коротко')
+        self.assertFalse(PostBody.objects.filter(pk=post.pk).exists())
+
+    def test_bulk_create_moves_long_texts(self):
+        posts = Post.objects.bulk_create(
+            Post(author=self.user, text=text)
+            for text in (self.TEXT, 'Коротко'))
+        self.assertEqual(
+            list(PostBody.objects.filter(
+                pk__in=[post.pk for post in posts]).values_list(
+                    'pk', 'text')),
+            [(posts[0].pk, self.TEXT)])
+        self.assertEqual(raw_text(Post, posts[0].pk), self.TEXT[:100])
+
+    def test_post_detail_shows_full_text(self):
+        """Полный текст загружается тем же запросом, что и запись"""
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('posts:post_detail', args=(self.post.pk,)))
+        self.assertContains(response, self.TEXT.strip(), count=2)
+
+    def test_edit_form_shows_full_text(self):
+        form = PostForm(instance=Post.objects.get(pk=self.post.pk))
+        self.assertEqual(form.initial['text'], self.TEXT)
+
+    def test_archive_keeps_full_text(self):
+        archive_batch([self.post.pk])
+        self.assertEqual(ArchivedPost.objects.get().text, self.TEXT)
+        self.assertEqual(ArchivedComment.objects.get().text, self.TEXT)
+        self.assertFalse(PostBody.objects.exists())
+        self.assertFalse(CommentBody.objects.exists())
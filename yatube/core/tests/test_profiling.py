@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from core.profiling import ProfilerMiddleware, make_token
+from django.conf import settings
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import ResolverMatch
+
+PROFILER_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def busy_view(request):
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    return HttpResponse('ok')
+
+
+def get_response(request):
+    request.resolver_match = ResolverMatch(
+        busy_view, (), {}, url_name='busy', namespaces=['posts'])
+    return busy_view(request)
+
+
+async def async_get_response(request):
+    request.resolver_match = ResolverMatch(
+        busy_view, (), {}, url_name='busy', namespaces=['posts'])
+    return await sync_to_async(busy_view)(request)
+
+
+@override_settings(
+    PROFILER_DIR=PROFILER_DIR, PROFILER_SAMPLE_RATE=0,
+    PROFILER_INTERVAL=0.001)
+class ProfilerMiddlewareTest(SimpleTestCase):
+    def setUp(self):
+        shutil.rmtree(PROFILER_DIR, ignore_errors=True)
+        self.middleware = ProfilerMiddleware(get_response)
+        self.factory = RequestFactory()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(PROFILER_DIR, ignore_errors=True)
+
+    def profiles(self):
+        if not os.path.isdir(PROFILER_DIR):
+            return []
+        return sorted(os.listdir(PROFILER_DIR))
+
+    def test_not_sampled(self):
+        """Без выборки и заголовка запрос не профилируется"""
+        self.middleware(self.factory.get('/'))
+        self.middleware(self.factory.get('/', HTTP_X_PROFILE='forged'))
+        self.assertEqual(self.profiles(), [])
+
+    def test_signed_header(self):
+        """Подписанный заголовок включает профилирование запроса"""
+        self.middleware(self.factory.get('/', HTTP_X_PROFILE=make_token()))
+        profiles = self.profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertIn('posts.busy', profiles[0])
+        with open(os.path.join(PROFILER_DIR, profiles[0])) as profile:
+            content = profile.read()
+        self.assertIn('# view: posts:busy', content)
+        self.assertIn(
+            'core.tests.test_profiling:get_response;'
+            'core.tests.test_profiling:busy_view ', content)
+
+    async def test_async_samples_view_thread(self):
+        """Под ASGI профиль показывает код, выполненный в sync_to_async"""
+        middleware = ProfilerMiddleware(async_get_response)
+        await middleware(self.factory.get('/', HTTP_X_PROFILE=make_token()))
+        [name] = self.profiles()
+        with open(os.path.join(PROFILER_DIR, name)) as profile:
+            self.assertIn('core.tests.test_profiling:busy_view ',
+                          profile.read())
+
+    @override_settings(PROFILER_SAMPLE_RATE=1, PROFILER_MAX_FILES=2)
+    def test_rotation_and_merge(self):
+        """Старые профили удаляются, merge_profiles сводит остальные"""
+        for _ in range(3):
+            self.middleware(self.factory.get('/'))
+        self.assertEqual(len(self.profiles()), 2)
+        output = os.path.join(PROFILER_DIR, 'merged.txt')
+        stdout = StringIO()
+        call_command('merge_profiles', output=output, stdout=stdout)
+        self.assertIn('posts:busy: запросов 2', stdout.getvalue())
+        self.assertIn('core.tests.test_profiling:busy_view', stdout.getvalue())
+        with open(output) as merged:
+            self.assertTrue(merged.readline().startswith(
+                'posts:busy;'))
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from core.querylog import fingerprint, query_stats
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post, User
+
+QUERY_STATS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(QUERY_STATS_DIR=QUERY_STATS_DIR)
+class QueryLogTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.user, text='Тестовая запись')
+
+    def setUp(self):
+        shutil.rmtree(QUERY_STATS_DIR, ignore_errors=True)
+        query_stats.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(QUERY_STATS_DIR, ignore_errors=True)
+
+    def test_fingerprint_strips_literals(self):
+        key, normalized = fingerprint(
+            "SELECT * FROM t WHERE a = 'x''y' AND b IN (1, 2) AND c = 1.5")
+        self.assertEqual(
+            normalized, 'SELECT * FROM t WHERE a = %s AND b IN (...) '
+            'AND c = %s')
+        self.assertEqual(
+            key, fingerprint("SELECT * FROM t WHERE a = 'z' "
+                             "AND b IN (3) AND c = 7")[0])
+
+    def test_queries_recorded_with_view(self):
+        self.client.get(reverse('posts:index'))
+        views = set()
+        for entry in query_stats.queries.values():
+            views.update(entry['views'])
+        self.assertIn('posts:index', views)
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_slow_queries_logged(self):
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            Post.objects.filter(pk=1).exists()
+        record = logs.records[0]
+        self.assertIn('posts_post', record.sql)
+        self.assertGreaterEqual(record.duration_ms, 0)
+
+    def test_top_queries_with_explain(self):
+        for pk in range(3):
+            Post.objects.filter(pk=pk).first()
+        query_stats.flush(force=True)
+        [name] = os.listdir(QUERY_STATS_DIR)
+        with open(os.path.join(QUERY_STATS_DIR, name)) as stats:
+            self.assertTrue(json.load(stats))
+        out = StringIO()
+        call_command('top_queries', '--sort', 'count', stdout=out)
+        output = out.getvalue()
+        self.assertIn('выполнений 3', output)
+        self.assertIn('EXPLAIN:', output)
+        call_command('top_queries', '--reset', '--no-explain',
+                     stdout=StringIO())
+        self.assertEqual(os.listdir(QUERY_STATS_DIR), [])
+
+    def test_params_not_saved(self):
+        User.objects.filter(username='secret-value').first()
+        query_stats.flush(force=True)
+        [name] = os.listdir(QUERY_STATS_DIR)
+        with open(os.path.join(QUERY_STATS_DIR, name)) as stats:
+            self.assertNotIn('secret-value', stats.read())
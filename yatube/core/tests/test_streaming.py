@@ -0,0 +1,64 @@
+from core.streaming import FLUSH_MARKER, stream_template
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import (AsyncClient, Client, RequestFactory, TestCase,
+                         override_settings)
+from django.urls import reverse
+from posts.models import Comment, Post, User
+
+
+@override_settings(FEED_TEMPLATE_ENGINE='jinja2', FEED_STREAMING=True)
+class StreamTemplateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Запись {number}')
+            for number in range(10)
+        )
+        cls.post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Ответ {number}')
+            for number in range(50)
+        )
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+        posts = Post.objects.select_related('author', 'group')
+        self.context = {'page_obj': Paginator(posts, 10).get_page(1)}
+
+    def test_head_flushed_before_articles(self):
+        """Шапка уходит отдельным куском до записей"""
+        chunks = list(stream_template(
+            'posts/index.html', self.context, self.request, using='jinja2'))
+        self.assertGreater(len(chunks), 1)
+        self.assertIn('</header>', chunks[0])
+        self.assertNotIn('<article', chunks[0])
+        expected = render_to_string(
+            'posts/index.html', self.context, self.request, using='jinja2')
+        self.assertEqual(''.join(chunks), expected.replace(FLUSH_MARKER, ''))
+
+    def test_django_template_single_chunk(self):
+        """Шаблон Django отдается одним куском"""
+        chunks = list(stream_template(
+            'posts/index.html', self.context, self.request, using='django'))
+        self.assertEqual(len(chunks), 1)
+        self.assertIn('<article', chunks[0])
+
+    def test_post_detail_streamed(self):
+        """post_detail отдается потоком вместе с комментариями"""
+        response = Client().get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content.count('Ответ '), 50)
+
+    async def test_post_detail_streamed_asgi(self):
+        """Под ASGI поток асинхронный и не собирается заранее"""
+        response = await AsyncClient().get(
+            reverse('posts:post_detail', args=[self.post.pk]))
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks).decode().count('Ответ '), 50)
@@ -0,0 +1,128 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings as django_settings
+from django.db import connections, router
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+class KVStore(cached_db_kvstore.KVStore):
+    """
+    Хранилище метаданных sorl: LRU процесса -> общий кэш -> БД.
+    Ключи миниатюр — хэши имени и параметров, поэтому значения
+    не устаревают и LRU процесса не нуждается в инвалидации.
+    """
+    def __init__(self):
+        super().__init__()
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_size = django_settings.THUMBNAIL_LOCAL_CACHE_SIZE
+
+    def _local_get(self, key):
+        with self._lock:
+            value = self._local.get(key)
+            if value is not None:
+                self._local.move_to_end(key)
+            return value
+
+    def _local_set(self, key, value):
+        with self._lock:
+            self._local[key] = value
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def _get_raw(self, key):
+        value = self._local_get(key)
+        if value is None:
+            value = super()._get_raw(key)
+            if value is not None:
+                self._local_set(key, value)
+        return value
+
+    def _set_raw(self, key, value):
+        # Один INSERT ... ON CONFLICT вместо get_or_create с SAVEPOINT.
+        target = connections[router.db_for_write(KVStoreModel)]
+        KVStoreModel.objects.bulk_create(
+            [KVStoreModel(key=key, value=value)],
+            update_conflicts=True, update_fields=['value'],
+            unique_fields=(
+                ['key']
+                if target.features.supports_update_conflicts_with_target
+                else None))
+        self.cache.set(key, value, settings.THUMBNAIL_CACHE_TIMEOUT)
+        self._local_set(key, value)
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+    def clear(self, delete_thumbnails=False):
+        super().clear(delete_thumbnails)
+        with self._lock:
+            self._local.clear()
+
+    def prefetch(self, image_files, sources=()):
+        """
+        Загружает метаданные пачки файлов: один get_many и один запрос.
+        Для исходников заодно загружаются списки их миниатюр.
+        """
+        keys = [
+            add_prefix(image_file.key)
+            for image_file in [*image_files, *sources]
+        ] + [add_prefix(source.key, 'thumbnails') for source in sources]
+        with self._lock:
+            missing = [key for key in keys if key not in self._local]
+        if not missing:
+            return
+        found = self.cache.get_many(missing)
+        rest = [key for key in missing if key not in found]
+        if rest:
+            stored = dict(KVStoreModel.objects.filter(
+                key__in=rest).values_list('key', 'value'))
+            self.cache.set_many({
+                key: stored.get(key, cached_db_kvstore.EMPTY_VALUE)
+                for key in rest
+            }, settings.THUMBNAIL_CACHE_TIMEOUT)
+            found.update(stored)
+        for key, value in found.items():
+            if value != cached_db_kvstore.EMPTY_VALUE:
+                self._local_set(key, value)
+
+
+def thumbnail_file(file_, geometry_string, **options):
+    """
+    ImageFile миниатюры без обращения к хранилищу: повторяет расчет
+    имени из ThumbnailBackend.get_thumbnail.
+    """
+    backend = default.backend
+    source = ImageFile(file_)
+    if settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry_string, options)
+    return ImageFile(name, default.storage)
+
+
+def prefetch_thumbnails(files, geometry_string, **options):
+    if not hasattr(default.kvstore, 'prefetch'):
+        return
+    # Исходники нужны, если миниатюры еще нет: без них sorl читает
+    # метаданные каждого исходника отдельным запросом.
+    files = [file_ for file_ in files if file_]
+    default.kvstore.prefetch(
+        [thumbnail_file(file_, geometry_string, **options) for file_ in files],
+        sources=[ImageFile(file_) for file_ in files])
@@ -1,19 +1,127 @@
 from django.contrib import admin
-from .models import Group, Post
+from django.contrib.auth import get_permission_codename
+from django.db import models
+from django.utils.text import Truncator
 
+from .deletion import relations, schedule_deletion
+from .forms import FullTextForm
+from .models import Comment, Deletion, Follow, Group, Post
+from .paginator import EstimatedCountPaginator
 
-class PostAdmin(admin.ModelAdmin):
+
+class FastChangeListMixin:
+    """
+    Для таблиц на миллионы строк: без полного COUNT рядом с фильтрами,
+    число строк без фильтров — оценка из кэша.
+    """
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    list_per_page = 50
+
+
+class BackgroundDeleteMixin:
+    """
+    Объект скрывается сразу, а удаляется со связанными строками в фоне
+    (posts.deletion). Страница подтверждения показывает число строк по
+    прямым связям вместо обхода всего графа в памяти.
+    """
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        perms_needed = set()
+        for relation, on_delete in relations(self.model):
+            if on_delete is not models.CASCADE:
+                continue
+            related = relation.related_model
+            count = related._base_manager.filter(
+                **{f'{relation.field.name}__in': objs}).count()
+            if not count:
+                continue
+            opts = related._meta
+            name = opts.verbose_name_plural
+            model_count[name] = model_count.get(name, 0) + count
+            codename = get_permission_codename('delete', opts)
+            if (related in self.admin_site._registry
+                    and not request.user.has_perm(
+                        f'{opts.app_label}.{codename}')):
+                perms_needed.add(opts.verbose_name)
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            schedule_deletion(obj)
+
+
+class PostAdmin(BackgroundDeleteMixin, FastChangeListMixin,
+                admin.ModelAdmin):
+    form = FullTextForm
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
-    search_fields = ('text',)
+    list_select_related = ('author', 'group')
+    search_fields = ('text', '=author__username')
+    search_help_text = 'Текст записи или точное имя автора'
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     list_editable = ('group',)
+    autocomplete_fields = ('author',)
     empty_value_display = '-пусто-'
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs)
+        changelist = (
+            request.resolver_match.url_name == 'posts_post_changelist')
+        if db_field.name == 'group' and changelist:
+            # Один запрос групп на страницу вместо одного на строку.
+            if not hasattr(request, '_group_choices'):
+                request._group_choices = list(formfield.choices)
+            formfield.choices = request._group_choices
+        return formfield
 
-class GroupAdmin(admin.ModelAdmin):
+
+class GroupAdmin(BackgroundDeleteMixin, admin.ModelAdmin):
     list_display = ('pk', 'title', 'description')
+    search_fields = ('title', 'slug')
     empty_value_display = 'пусто'
 
 
+class CommentAdmin(FastChangeListMixin, admin.ModelAdmin):
+    form = FullTextForm
+    list_display = ('pk', 'short_text', 'post_id', 'author', 'created')
+    list_select_related = ('author',)
+    search_fields = ('=author__username', '=post__id')
+    date_hierarchy = 'created'
+    raw_id_fields = ('post',)
+    autocomplete_fields = ('author',)
+
+    @admin.display(description='Текст')
+    def short_text(self, comment):
+        return Truncator(comment.text).chars(80)
+
+
+class FollowAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = ('=user__username', '=author__username')
+    autocomplete_fields = ('user', 'author')
+
+
+class DeletionAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'label', 'title', 'progress', 'created',
+                    'finished', 'error')
+    list_filter = ('label', 'finished')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(Deletion, DeletionAdmin)
@@ -0,0 +1,74 @@
+from collections import Counter
+
+from core.models import Blob
+from django.db import transaction
+from django.db.models import F
+
+from .models import (ArchivedComment, ArchivedPost, Comment, CommentBody,
+                     Post, PostBody)
+
+
+def field_names(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def restore_full_texts(rows, body_model):
+    """Подставляет в строки полные тексты вместо начала из text."""
+    long_ids = [row['id'] for row in rows if row.pop('long_text')]
+    bodies = dict(body_model.objects.filter(
+        pk__in=long_ids).values_list('pk', 'text'))
+    for row in rows:
+        row['text'] = bodies.get(row['id'], row['text'])
+
+
+def archive_batch(post_ids):
+    """
+    Переносит записи post_ids с комментариями в архив одной транзакцией
+    и возвращает число перенесенных записей. Ссылки на картинки
+    переходят к архивным записям, файлы остаются на месте.
+    """
+    with transaction.atomic():
+        posts = list(
+            Post.objects.select_for_update().filter(
+                pk__in=post_ids, hidden=False
+            ).values(*field_names(ArchivedPost), 'long_text'))
+        if not posts:
+            return 0
+        post_ids = [post['id'] for post in posts]
+        comments = list(Comment.objects.filter(post__in=post_ids).values(
+            *field_names(ArchivedComment), 'long_text'))
+        restore_full_texts(posts, PostBody)
+        restore_full_texts(comments, CommentBody)
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**post) for post in posts)
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**comment) for comment in comments)
+        # bulk_create не шлет post_save: ссылки добавляются здесь,
+        # а удаление записей ниже их же и снимет.
+        images = Counter(post['image'] for post in posts if post['image'])
+        for name, count in images.items():
+            Blob.objects.filter(name=name).update(refs=F('refs') + count)
+        Comment.objects.filter(post__in=post_ids).delete()
+        Post.objects.filter(pk__in=post_ids).delete()
+    return len(posts)
+
+
+def archive_posts(cutoff, batch_size, limit=None):
+    """
+    Переносит в архив записи старше cutoff пачками по batch_size, от
+    старых к новым, и после каждой пачки отдает число перенесенных.
+    Прерванный запуск продолжается со следующей записи, поэтому архив
+    всегда старше любой записи в горячей таблице.
+    """
+    posts = Post.objects.filter(
+        pub_date__lt=cutoff, hidden=False
+    ).order_by('pk').values_list('pk', flat=True)
+    done = 0
+    while limit is None or done < limit:
+        size = batch_size if limit is None else min(
+            batch_size, limit - done)
+        post_ids = list(posts[:size])
+        if not post_ids:
+            return
+        done += archive_batch(post_ids)
+        yield done
@@ -1,19 +1,74 @@
+import asyncio
 from functools import WRAPPER_ASSIGNMENTS, wraps
 
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.middleware.cache import CacheMiddleware
+from django.utils.cache import patch_cache_control
 from django.views.decorators.cache import cache_page
 
 
-def cache_on_auth(timeout):
+def is_authenticated(request):
+    return request.user.is_authenticated
+
+
+def set_public_cache_control(request, response, timeout):
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return response
+    # Браузер каждый раз перепроверяет страницу, прокси хранит ее timeout.
+    patch_cache_control(response, public=True, max_age=0, s_maxage=timeout)
+    response.headers.pop('Expires', None)
+    return response
+
+
+def edge_cache(timeout):
     """
-    Caches views up to two times: Once for authenticated users, and
-    once for unauthenticated users.
+    Разрешает прокси кэшировать страницу: она одна на всех, а
+    персональное подгружается с posts:fragments.
     """
     def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func, assigned=WRAPPER_ASSIGNMENTS)
+            async def _wrapped_async_view(request, *args, **kwargs):
+                response = await view_func(request, *args, **kwargs)
+                return set_public_cache_control(request, response, timeout)
+            return _wrapped_async_view
+
         @wraps(view_func, assigned=WRAPPER_ASSIGNMENTS)
         def _wrapped_view(request, *args, **kwargs):
-            result = cache_page(
-                timeout,
-                key_prefix=(f"_auth_{request.user.is_authenticated}_"))
-            return result(view_func)(request, *args, **kwargs)
+            response = view_func(request, *args, **kwargs)
+            return set_public_cache_control(request, response, timeout)
         return _wrapped_view
-    return decorator
\ No newline at end of file
+    return decorator
+
+
+def cache_public(timeout):
+    """
+    Кэширует одну копию страницы для всех посетителей и разрешает
+    хранить ее прокси.
+    """
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func, assigned=WRAPPER_ASSIGNMENTS)
+            async def _wrapped_async_view(request, *args, **kwargs):
+                middleware = CacheMiddleware(view_func, page_timeout=timeout)
+                response = await sync_to_async(
+                    middleware.process_request)(request)
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                    response = await sync_to_async(
+                        middleware.process_response)(request, response)
+                return response
+            return edge_cache(timeout)(_wrapped_async_view)
+        return edge_cache(timeout)(cache_page(timeout)(view_func))
+    return decorator
+
+
+def async_login_required(view_func):
+    """login_required для async-представлений."""
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        if await sync_to_async(is_authenticated)(request):
+            return await view_func(request, *args, **kwargs)
+        return redirect_to_login(request.get_full_path())
+    return _wrapped_view
@@ -0,0 +1,166 @@
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from core.storage import collect
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, models, transaction
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+from .models import Deletion, Group, Post, User
+from .paginator import forget_counts, stale_counts
+
+logger = logging.getLogger(__name__)
+
+executor = SimpleLazyObject(lambda: ThreadPoolExecutor(
+    max_workers=settings.DELETION_WORKERS,
+    thread_name_prefix='deletions',
+))
+
+
+def relations(model):
+    """Обратные связи, которые обошел бы delete(): CASCADE и SET_NULL."""
+    for relation in get_candidate_relations_to_delete(model._meta):
+        on_delete = relation.field.remote_field.on_delete
+        if on_delete in (models.CASCADE, models.SET_NULL):
+            yield relation, on_delete
+
+
+def hide(obj):
+    """Убирает объект со страниц и из лент до удаления."""
+    if isinstance(obj, User):
+        # Заодно закрывает вход: CachedModelBackend не пустит такого
+        # пользователя, а его копия в кэше сбрасывается при сохранении.
+        obj.is_active = False
+        obj.save(update_fields=['is_active'])
+        stale_counts('index', 'admin:posts.post')
+    elif isinstance(obj, Post):
+        Post.objects.filter(pk=obj.pk).update(hidden=True)
+        stale_counts('index', f'group:{obj.group_id}', 'admin:posts.post')
+    elif isinstance(obj, Group):
+        Group.objects.filter(pk=obj.pk).update(hidden=True)
+
+
+def schedule_deletion(obj):
+    """
+    Скрывает объект и ставит удаление его со связанными строками в
+    фоновый пул после коммита. При DELETION_WORKERS = 0 удаление
+    выполняется сразу после коммита.
+    """
+    with transaction.atomic():
+        hide(obj)
+        deletion = Deletion.objects.create(
+            label=obj._meta.label_lower,
+            object_id=obj.pk,
+            title=str(obj)[:200],
+        )
+    if settings.DELETION_WORKERS:
+        transaction.on_commit(
+            lambda: executor.submit(run_in_worker, deletion.pk))
+    else:
+        transaction.on_commit(lambda: Cascade(deletion).run())
+    return deletion
+
+
+def run_in_worker(deletion_id):
+    close_old_connections()
+    try:
+        deletion = Deletion.objects.filter(
+            pk=deletion_id, finished=None).first()
+        if deletion is not None:
+            Cascade(deletion).run()
+    finally:
+        close_old_connections()
+
+
+class Cascade:
+    """
+    Удаляет объект Deletion пачками по batch_size строк. Перед каждой
+    пачкой так же пачками удаляются зависимые строки и обнуляются
+    ссылки SET_NULL, поэтому delete() самой пачки почти ничего не
+    собирает и держит блокировку БД недолго. Ход пишется в
+    Deletion.progress и передается в report(label, count).
+    """
+    def __init__(self, deletion, batch_size=None, report=None):
+        self.deletion = deletion
+        self.batch_size = batch_size or settings.DELETION_BATCH_SIZE
+        self.report = report
+        self.progress = Counter(deletion.progress)
+        self.images = set()
+
+    def run(self):
+        model = apps.get_model(self.deletion.label)
+        rows = model._base_manager.filter(pk=self.deletion.object_id)
+        try:
+            self.drain(rows)
+        except Exception as error:
+            logger.exception('Не удалось удалить %s', self.deletion)
+            Deletion.objects.filter(pk=self.deletion.pk).update(
+                progress=dict(self.progress), error=str(error))
+            return False
+        if model is Group:
+            forget_counts(f'group:{self.deletion.object_id}')
+        self.remove_images()
+        Deletion.objects.filter(pk=self.deletion.pk).update(
+            progress=dict(self.progress), error='',
+            finished=timezone.now())
+        return True
+
+    def batches(self, queryset):
+        pks = queryset.order_by('pk').values_list('pk', flat=True)
+        while True:
+            batch = list(pks[:self.batch_size])
+            if not batch:
+                return
+            yield batch
+
+    def drain(self, queryset):
+        model = queryset.model
+        files = [
+            field.attname for field in model._meta.concrete_fields
+            if isinstance(field, models.FileField)
+        ]
+        for batch in self.batches(queryset):
+            for relation, on_delete in relations(model):
+                related = relation.related_model._base_manager.filter(
+                    **{f'{relation.field.name}__in': batch})
+                if on_delete is models.SET_NULL:
+                    self.nullify(related, relation.field.name)
+                else:
+                    self.drain(related)
+            rows = model._base_manager.filter(pk__in=batch)
+            if files:
+                self.images.update(
+                    name for names in rows.values_list(*files)
+                    for name in names if name)
+            with transaction.atomic():
+                _, counts = rows.delete()
+            self.advance(counts)
+
+    def nullify(self, queryset, field_name):
+        model = queryset.model
+        for batch in self.batches(queryset):
+            with transaction.atomic():
+                model._base_manager.filter(pk__in=batch).update(
+                    **{field_name: None})
+
+    def advance(self, counts):
+        # Ключи как в Deletion.label: 'posts.post'.
+        counts = {
+            label.lower(): count for label, count in counts.items() if count}
+        self.progress.update(counts)
+        Deletion.objects.filter(pk=self.deletion.pk).update(
+            progress=dict(self.progress))
+        for label, count in counts.items():
+            logger.info('Удаление %s: %s %d строк',
+                        self.deletion, label, count)
+            if self.report is not None:
+                self.report(label, self.progress[label])
+
+    def remove_images(self):
+        """Файлы без других ссылок удаляются вместе с нарезками."""
+        for name in self.images:
+            collect(name)
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import queue
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from time import monotonic
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
+
+
+class LocalEventBus:
+    """
+    Внутрипроцессная шина событий: каждому подписчику своя очередь.
+    Медленный подписчик с переполненной очередью теряет события,
+    а не тормозит публикацию. События не выходят за пределы процесса,
+    поэтому с ней ASGI-сервер запускается одним процессом.
+    """
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = tuple(self._subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+    @contextmanager
+    def subscribe(self, channels, asynchronous=False):
+        if asynchronous:
+            subscription = AsyncSubscription(self.queue_size)
+        else:
+            subscription = Subscription(self.queue_size)
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                for channel in channels:
+                    self._subscribers[channel].discard(subscription)
+                    if not self._subscribers[channel]:
+                        del self._subscribers[channel]
+
+
+class Subscription:
+    def __init__(self, queue_size):
+        self._queue = queue.Queue(maxsize=queue_size)
+
+    def put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            pass
+
+    def get(self, timeout):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription:
+    """Подписка для event loop: ожидание не занимает поток."""
+    def __init__(self, queue_size):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=queue_size)
+
+    def put(self, event):
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass
+
+    def _put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def _load_event_bus():
+    config = settings.EVENT_BUS
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+event_bus = SimpleLazyObject(_load_event_bus)
+
+
+def post_channel(post_id):
+    return f'post-{post_id}'
+
+
+def author_channel(author_id):
+    return f'author-{author_id}'
+
+
+def format_event(event):
+    if event is None:
+        return ': keepalive\n\n'
+    data = json.dumps(event, ensure_ascii=False)
+    return f'event: {event["type"]}\ndata: {data}\n\n'
+
+
+async def aevent_stream(channels):
+    """
+    Поток событий в формате text/event-stream. Только для ASGI: ожидание
+    событий не занимает поток.
+    """
+    deadline = monotonic() + settings.EVENT_STREAM_LIFETIME
+    with event_bus.subscribe(channels, asynchronous=True) as subscription:
+        yield 'retry: 5000\n\n'
+        while monotonic() < deadline:
+            yield format_event(
+                await subscription.get(settings.EVENT_STREAM_KEEPALIVE))
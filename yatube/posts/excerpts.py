@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.utils.html import escape, linebreaks
+from django.utils.text import Truncator
+
+
+def make_excerpt(text, length=None):
+    """
+    Начало записи для лент: текст, обрезанный до EXCERPT_LENGTH символов,
+    и он же в HTML с абзацами. Возвращает (текст, html).
+    """
+    excerpt = Truncator(text).chars(length or settings.EXCERPT_LENGTH)
+    return excerpt, linebreaks(escape(excerpt))
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+MEMO_ATTRIBUTE = '_following_ids'
+
+
+def following_key(user_id):
+    return f'following:{user_id}'
+
+
+def following_ids(user):
+    """
+    id авторов, на которых подписан user. Множество загружается одним
+    запросом, хранится в кэше и запоминается на объекте пользователя,
+    так что проверки на странице идут в памяти.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    ids = getattr(user, MEMO_ATTRIBUTE, None)
+    if ids is None:
+        ids = cache.get(following_key(user.pk))
+        if ids is None:
+            ids = frozenset(Follow.objects.filter(
+                user_id=user.pk).values_list('author_id', flat=True))
+            cache.set(
+                following_key(user.pk), ids,
+                settings.FOLLOWING_CACHE_TIMEOUT)
+        setattr(user, MEMO_ATTRIBUTE, ids)
+    return ids
+
+
+def is_following(user, author):
+    author_id = getattr(author, 'pk', author)
+    return author_id != user.pk and author_id in following_ids(user)
+
+
+def forget_following(user_id):
+    """
+    Сбрасывает множество в кэше, следующее чтение загрузит его из БД.
+    Сброс повторяется после коммита: иначе параллельный запрос успел бы
+    положить в кэш множество без незакоммиченной подписки.
+    """
+    key = following_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
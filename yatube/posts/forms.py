@@ -1,14 +1,41 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from posts.images import process_image
 from posts.models import Post, Comment
 
 
-class PostForm(forms.ModelForm):
+class FullTextForm(forms.ModelForm):
+    """Показывает для правки полный текст, а не начало из колонки text."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.long_text:
+            self.initial['text'] = self.instance.full_text
+
+
+class PostForm(FullTextForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile) or not image:
+            self.instance.image_variants = {}
+        if not image:
+            self.instance.image_width = None
+            self.instance.image_height = None
+            self.instance.image_color = ''
+            return image
+        if not isinstance(image, UploadedFile):
+            return image
+        (image,
+         self.instance.image_width,
+         self.instance.image_height,
+         self.instance.image_color) = process_image(image)
+        return image
+
 
-class CommentForm(forms.ModelForm):
+class CommentForm(FullTextForm):
     class Meta:
         model = Comment
         fields = ('text',)
@@ -0,0 +1,129 @@
+import os
+from io import BytesIO
+
+from core.storage import variant_name
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+def average_color(image):
+    red, green, blue = image.convert('RGB').resize(
+        (1, 1), Image.BOX).getpixel((0, 0))
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def process_image(upload):
+    """
+    Проверяет загруженную картинку и перекодирует её в WebP:
+    без EXIF, с учетом ориентации и не больше POST_IMAGE_MAX_SIDE.
+    Возвращает файл, ширину, высоту и средний цвет.
+    Анимации сохраняются как есть.
+    """
+    if upload.size > settings.POST_IMAGE_MAX_SIZE:
+        raise ValidationError(
+            'Файл слишком большой: не больше %(size)d МБ.',
+            code='file_too_large',
+            params={'size': settings.POST_IMAGE_MAX_SIZE // 2 ** 20},
+        )
+    upload.seek(0)
+    image = Image.open(upload)
+    width, height = image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком большое разрешение картинки.',
+            code='too_many_pixels',
+        )
+    if getattr(image, 'is_animated', False):
+        color = average_color(image)
+        upload.seek(0)
+        return upload, width, height, color
+    image = ImageOps.exif_transpose(image)
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert(
+            'RGBA' if 'transparency' in image.info else 'RGB')
+    buffer = BytesIO()
+    image.save(buffer, 'WEBP', quality=settings.POST_IMAGE_QUALITY)
+    name = os.path.splitext(os.path.basename(upload.name))[0] + '.webp'
+    return (ContentFile(buffer.getvalue(), name=name),
+            image.width, image.height, average_color(image))
+
+
+def prime_thumbnail_source(post):
+    """Сохраняет размер оригинала в хранилище sorl, чтобы не открывать файл."""
+    if not post.image or not post.image_width:
+        return
+    from sorl.thumbnail import default
+    from sorl.thumbnail.images import ImageFile
+
+    source = ImageFile(post.image)
+    source.set_size((post.image_width, post.image_height))
+    default.kvstore.set(source)
+
+
+def variant_size(width):
+    ratio = settings.POST_IMAGE_VARIANT_RATIO
+    return width, round(width * ratio[1] / ratio[0])
+
+
+EXIF_ORIENTATION = 0x0112
+# Ориентации EXIF с поворотом на 90°: ширина после exif_transpose — это
+# высота исходного кадра.
+TRANSPOSED = (5, 6, 7, 8)
+
+
+def build_variants(image_field, overwrite=False):
+    """
+    Нарезает картинку записи в нескольких ширинах (JPEG и WebP)
+    с тем же кадрированием, что и thumbnail в шаблонах.
+    Нарезки называются по имени картинки, то есть по хэшу содержимого:
+    записи с одной картинкой делят их, а готовые файлы не пишутся
+    заново (overwrite — пересобрать). Возвращает готовые srcset, чтобы
+    шаблон не обращался к хранилищу, и имена файлов нарезок.
+    """
+    storage = default_storage
+    with image_field.open('rb') as source, Image.open(source) as image:
+        image_width = image.width
+        if image.getexif().get(EXIF_ORIENTATION) in TRANSPOSED:
+            image_width = image.height
+        widths = [
+            width for width in settings.POST_IMAGE_VARIANT_WIDTHS
+            if width <= image_width
+        ] or list(settings.POST_IMAGE_VARIANT_WIDTHS[:1])
+        names = {
+            (width, ext): variant_name(image_field.name, f'{width}.{ext}')
+            for width in widths for ext in ('jpg', 'webp')
+        }
+        if overwrite or not all(map(storage.exists, names.values())):
+            image = ImageOps.exif_transpose(image).convert('RGB')
+            for width in widths:
+                variant = ImageOps.fit(
+                    image, variant_size(width), Image.LANCZOS)
+                for fmt, ext in (('jpeg', 'jpg'), ('webp', 'webp')):
+                    buffer = BytesIO()
+                    variant.save(
+                        buffer, fmt.upper(),
+                        quality=settings.POST_IMAGE_QUALITY)
+                    name = names[width, ext]
+                    # save() не перезаписывает, а добавил бы к имени суффикс.
+                    storage.delete(name)
+                    names[width, ext] = storage.save(
+                        name, ContentFile(buffer.getvalue()))
+    srcsets = {
+        fmt: ', '.join(
+            f'{storage.url(names[width, ext])} {width}w'
+            for width in widths)
+        for fmt, ext in (('jpeg', 'jpg'), ('webp', 'webp'))
+    }
+    width, height = variant_size(widths[-1])
+    return {
+        'src': storage.url(names[widths[-1], 'jpg']),
+        **srcsets,
+        'width': width,
+        'height': height,
+        'names': list(names.values()),
+    }
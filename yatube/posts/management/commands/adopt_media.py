@@ -0,0 +1,101 @@
+import re
+
+from core.models import Blob
+from core.storage import variant_name
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from posts.images import build_variants
+from posts.models import ArchivedPost, Post, content_storage
+
+MODELS = (Post, ArchivedPost)
+# posts/ab/cd/<sha256>.<расширение>: имя от ContentAddressedStorage.
+SHARDED = re.compile(r'^[^/]+/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}'
+                     r'(\.\w+)?$')
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки, загруженные до хранения по хэшу, в '
+        'ContentAddressedStorage: создает Blob с числом ссылок и '
+        'пересобирает нарезки, лежащие не в шардах картинки.'
+    )
+
+    def handle(self, *args, **options):
+        adopted = rebuilt = 0
+        for name in sorted(self.image_names()):
+            if SHARDED.match(name):
+                continue
+            if not content_storage.exists(name):
+                self.stderr.write(f'Нет файла {name}')
+                continue
+            self.adopt(name)
+            adopted += 1
+        for name in sorted(self.stale_variants()):
+            if self.rebuild(name):
+                rebuilt += 1
+        self.stdout.write(
+            f'Перенесено картинок: {adopted}, '
+            f'пересобрано нарезок: {rebuilt}')
+
+    @staticmethod
+    def image_names():
+        names = set()
+        for model in MODELS:
+            names.update(model.objects.exclude(image='').values_list(
+                'image', flat=True).distinct())
+        return names
+
+    @staticmethod
+    def stale_variants():
+        """Картинки, у записей которых нарезки не в шарде картинки."""
+        stale = set()
+        for model in MODELS:
+            rows = model.objects.exclude(image='').values_list(
+                'image', 'image_variants')
+            for name, variants in rows.iterator():
+                prefix = variant_name(name, '')
+                if not all(variant.startswith(prefix)
+                           for variant in variants.get('names', [''])):
+                    stale.add(name)
+        return stale
+
+    @staticmethod
+    def adopt(name):
+        """
+        Кладет файл под хэш содержимого и переводит на него записи.
+        Записи обновляются без сигналов, поэтому ссылки считаются здесь.
+        """
+        with content_storage.open(name) as source:
+            sharded = content_storage.save(name, source)
+        with transaction.atomic():
+            refs = sum(
+                model.objects.filter(image=name).update(image=sharded)
+                for model in MODELS)
+            Blob.objects.filter(name=sharded).update(refs=F('refs') + refs)
+        content_storage.delete(name)
+
+    def rebuild(self, name):
+        """
+        Нарезает картинку заново для всех ее записей и удаляет прежние
+        нарезки: после обновления на них никто не ссылается.
+        """
+        old = set()
+        for model in MODELS:
+            for variants in model.objects.filter(image=name).values_list(
+                    'image_variants', flat=True):
+                old.update(variants.get('names', []))
+        post = Post.objects.filter(image=name).only('image').first()
+        post = post or ArchivedPost.objects.filter(
+            image=name).only('image').first()
+        try:
+            variants = build_variants(post.image)
+        except (OSError, ValueError):
+            self.stderr.write(f'Не удалось нарезать {name}')
+            return False
+        for model in MODELS:
+            model.objects.filter(image=name).update(image_variants=variants)
+        for variant in old.difference(variants['names']):
+            content_storage.delete(variant)
+        return True
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import archive_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит старые записи с комментариями в архивные таблицы. '
+        'Можно запускать по крону: каждый запуск продолжает с места, '
+        'где остановился предыдущий.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ARCHIVE_AFTER_DAYS,
+            help='Архивировать записи старше этого числа дней.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.ARCHIVE_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Перенести не больше этого числа записей за запуск.',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        done = 0
+        for done in archive_posts(
+                cutoff, options['batch_size'], options['limit']):
+            self.stdout.write(f'Перенесено записей: {done}')
+        if not done:
+            self.stdout.write('Записей для архива нет')
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.tasks import generate_variants
+
+
+class Command(BaseCommand):
+    help = 'Нарезает варианты картинок для записей, у которых их нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересобрать варианты у всех записей с картинкой.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(image_variants={})
+        posts = posts.order_by('pk').values_list('pk', 'image')
+        done = last_pk = 0
+        # С --all общие нарезки одной картинки пересобираются один раз.
+        rebuilt = set()
+        while True:
+            chunk = list(posts.filter(pk__gt=last_pk)[:options['chunk_size']])
+            if not chunk:
+                break
+            for post_id, image in chunk:
+                overwrite = options['all'] and image not in rebuilt
+                generate_variants(post_id, overwrite)
+                rebuilt.add(image)
+            done += len(chunk)
+            last_pk = chunk[-1][0]
+            self.stdout.write(f'Обработано записей: {done}')
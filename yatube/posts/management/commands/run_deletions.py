@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.deletion import Cascade
+from posts.models import Deletion
+
+
+class Command(BaseCommand):
+    help = (
+        'Доводит до конца фоновые удаления, прерванные, например, '
+        'перезапуском.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        for deletion in Deletion.objects.filter(finished=None):
+            self.stdout.write(f'Удаление {deletion}')
+            done = Cascade(
+                deletion, options['batch_size'], report=self.report).run()
+            if not done:
+                deletion.refresh_from_db()
+                self.stderr.write(f'Ошибка: {deletion.error}')
+
+    def report(self, label, count):
+        self.stdout.write(f'  {label}: {count}')
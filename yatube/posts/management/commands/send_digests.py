@@ -0,0 +1,103 @@
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, F, OuterRef
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Post, User, users_being_deleted
+
+
+class Command(BaseCommand):
+    help = 'Рассылает дайджест новых записей авторов из подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period',
+            choices=tuple(settings.DIGEST_PERIODS),
+            default='daily',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.DIGEST_CHUNK_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(
+            days=settings.DIGEST_PERIODS[options['period']])
+        sent = 0
+        connection = get_connection()
+        connection.open()
+        try:
+            for users in user_chunks(options['chunk_size']):
+                messages = build_messages(users, since)
+                if messages:
+                    sent += connection.send_messages(messages) or 0
+        finally:
+            connection.close()
+        self.stdout.write(f'Отправлено дайджестов: {sent}')
+
+
+def user_chunks(size):
+    """Подписчики с почтой пачками по size, постранично по pk."""
+    users = User.objects.filter(is_active=True).exclude(email='').annotate(
+        has_follows=Exists(Follow.objects.filter(user=OuterRef('pk')))
+    ).filter(has_follows=True).order_by('pk').values_list(
+        'pk', 'username', 'email')
+    last_pk = 0
+    while True:
+        chunk = list(users.filter(pk__gt=last_pk)[:size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1][0]
+
+
+def build_messages(users, since):
+    """
+    Один запрос на всю пачку: новые записи по подписчикам. Полный текст
+    не читается, в письмо идет готовое начало записи.
+    """
+    recipients = {pk: (username, email) for pk, username, email in users}
+    rows = Post.objects.filter(
+        pub_date__gte=since,
+        hidden=False,
+        author__following__user_id__in=recipients,
+    ).exclude(
+        author__in=users_being_deleted(),
+    ).annotate(
+        subscriber=F('author__following__user_id'),
+    ).order_by('subscriber', '-pub_date').values_list(
+        'subscriber', 'pk', 'excerpt', 'pub_date', 'author__username')
+    messages = []
+    for subscriber, posts in groupby(rows.iterator(), key=itemgetter(0)):
+        username, email = recipients[subscriber]
+        digest, more = [], 0
+        for _, pk, excerpt, pub_date, author in posts:
+            if len(digest) >= settings.DIGEST_MAX_POSTS:
+                more += 1
+                continue
+            digest.append({
+                'author': author,
+                'pub_date': pub_date,
+                'excerpt': excerpt,
+                'url': settings.SITE_URL + reverse(
+                    'posts:post_detail', kwargs={'post_id': pk}),
+            })
+        body = render_to_string('posts/email/digest.txt', {
+            'username': username,
+            'posts': digest,
+            'more': more,
+        })
+        messages.append(EmailMessage(
+            subject='Новые записи в Yatube',
+            body=body,
+            to=[email],
+        ))
+    return messages
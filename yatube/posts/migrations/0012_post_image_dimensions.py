@@ -0,0 +1,59 @@
+# Generated by Django 4.2.16 on 2026-10-19 10:02
+
+from django.db import migrations, models
+from PIL import Image
+
+BATCH_SIZE = 500
+
+
+def average_color(image):
+    # Копия posts.images.average_color на момент миграции.
+    red, green, blue = image.convert('RGB').resize(
+        (1, 1), Image.BOX).getpixel((0, 0))
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def fill_image_dimensions(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.exclude(image='').only('image')
+    batch = []
+    for post in posts.iterator(chunk_size=BATCH_SIZE):
+        try:
+            with post.image.open('rb') as source, Image.open(source) as image:
+                post.image_width, post.image_height = image.size
+                post.image_color = average_color(image)
+        except (OSError, ValueError):
+            continue
+        batch.append(post)
+        if len(batch) >= BATCH_SIZE:
+            Post.objects.bulk_update(
+                batch, ('image_width', 'image_height', 'image_color'))
+            batch = []
+    Post.objects.bulk_update(
+        batch, ('image_width', 'image_height', 'image_color'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_alter_comment_author_alter_comment_post_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Основной цвет картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+        migrations.RunPython(fill_image_dimensions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.16 on 2026-10-19 10:37
+
+from django.db import migrations, models
+from django.utils.html import escape, linebreaks
+from django.utils.text import Truncator
+
+BATCH_SIZE = 500
+EXCERPT_LENGTH = 300
+
+
+def make_excerpt(text):
+    # Копия posts.excerpts.make_excerpt на момент миграции.
+    excerpt = Truncator(text).chars(EXCERPT_LENGTH)
+    return excerpt, linebreaks(escape(excerpt))
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.only('text')
+    batch = []
+    for post in posts.iterator(chunk_size=BATCH_SIZE):
+        post.excerpt, post.excerpt_html = make_excerpt(post.text)
+        batch.append(post)
+        if len(batch) >= BATCH_SIZE:
+            Post.objects.bulk_update(batch, ('excerpt', 'excerpt_html'))
+            batch = []
+    Post.objects.bulk_update(batch, ('excerpt', 'excerpt_html'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Начало текста в HTML'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
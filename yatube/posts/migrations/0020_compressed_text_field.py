@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:12
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedcomment',
+            name='text',
+            field=core.fields.CompressedTextField(verbose_name='Текст'),
+        ),
+        migrations.AlterField(
+            model_name='archivedpost',
+            name='text',
+            field=core.fields.CompressedTextField(verbose_name='Текст поста'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_compressed_text_field'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='deletion',
+            index=models.Index(fields=['label', 'finished'], name='posts_delet_label_5509b9_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.16 on 2026-10-19 11:34
+
+import core.fields
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import Length
+
+BATCH_SIZE = 500
+# Копия COMPRESSED_TEXT_THRESHOLD на момент миграции.
+COMPRESSED_TEXT_THRESHOLD = 2048
+MODELS = (('Post', 'PostBody'), ('Comment', 'CommentBody'))
+
+
+def move_long_texts(apps, schema_editor):
+    for name, body_name in MODELS:
+        model = apps.get_model('posts', name)
+        body_model = apps.get_model('posts', body_name)
+        pks = list(model.objects.annotate(length=Length('text')).filter(
+            length__gte=COMPRESSED_TEXT_THRESHOLD).values_list(
+                'pk', flat=True))
+        for start in range(0, len(pks), BATCH_SIZE):
+            batch = list(model.objects.filter(
+                pk__in=pks[start:start + BATCH_SIZE]).only('text'))
+            body_model.objects.bulk_create(
+                body_model(pk=obj.pk, text=obj.text) for obj in batch)
+            for obj in batch:
+                obj.text = obj.text[:COMPRESSED_TEXT_THRESHOLD]
+                obj.long_text = True
+            model.objects.bulk_update(batch, ('text', 'long_text'))
+
+
+def restore_long_texts(apps, schema_editor):
+    for name, body_name in MODELS:
+        model = apps.get_model('posts', name)
+        body_model = apps.get_model('posts', body_name)
+        batch = []
+        for body in body_model.objects.iterator(chunk_size=BATCH_SIZE):
+            batch.append(model(pk=body.pk, text=body.text))
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, ('text',))
+                batch = []
+        model.objects.bulk_update(batch, ('text',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_deletion_pending_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentBody',
+            fields=[
+                ('comment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='body', serialize=False, to='posts.comment', verbose_name='Комментарий')),
+                ('text', core.fields.CompressedTextField(verbose_name='Текст')),
+            ],
+            options={
+                'verbose_name': 'Полный текст комментария',
+                'verbose_name_plural': 'Полные тексты комментариев',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostBody',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='body', serialize=False, to='posts.post', verbose_name='Пост')),
+                ('text', core.fields.CompressedTextField(verbose_name='Текст поста')),
+            ],
+            options={
+                'verbose_name': 'Полный текст поста',
+                'verbose_name_plural': 'Полные тексты постов',
+            },
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='long_text',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст длиннее порога'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='long_text',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст длиннее порога'),
+        ),
+        migrations.RunPython(move_long_texts, restore_long_texts),
+    ]
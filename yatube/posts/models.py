@@ -1,11 +1,139 @@
-from django.db import models
+from core.fields import CompressedTextField
+from core.storage import ContentAddressedStorage
+from django.conf import settings
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
+from .excerpts import make_excerpt
+
 User = get_user_model()
 
+content_storage = ContentAddressedStorage()
+
+
+class LongTextQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # save() не вызывается, длинные тексты переносятся в body здесь.
+        objs = list(objs)
+        texts = [obj.cut_text() for obj in objs]
+        body_model = self.model.body_model()
+        with transaction.atomic(using=self.db):
+            try:
+                created = super().bulk_create(objs, *args, **kwargs)
+            finally:
+                for obj, text in zip(objs, texts):
+                    obj.text = text
+            body_model.objects.bulk_create(
+                body_model(pk=obj.pk, text=text)
+                for obj, text in zip(objs, texts) if obj.long_text)
+        return created
+
+
+class PostQuerySet(LongTextQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # save() не вызывается, начало текста заполняется здесь.
+        objs = list(objs)
+        for post in objs:
+            post.fill_excerpt()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def visible(self):
+        """Без записей и авторов, ожидающих фонового удаления."""
+        return self.filter(hidden=False).exclude(
+            author__in=users_being_deleted())
+
+
+class LongTextModel(models.Model):
+    """
+    Текст от COMPRESSED_TEXT_THRESHOLD символов целиком хранится сжатым
+    в связанной строке body, а в text остается его начало. Строки
+    горячей таблицы не растут, а полный текст (full_text) читают только
+    страница записи, формы правки и архив.
+    """
+    long_text = models.BooleanField(
+        'Текст длиннее порога',
+        default=False,
+        editable=False
+    )
+
+    # Значение колонки text, каким его видел этот объект, и полный текст.
+    _stored_text = None
+    _body_text = None
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_text = instance.__dict__.get('text')
+        return instance
+
+    @classmethod
+    def body_model(cls):
+        return cls._meta.get_field('body').related_model
 
-class Post(models.Model):
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        if fields is None or 'text' in fields:
+            self._stored_text = self.__dict__.get('text')
+            self._body_text = None
+
+    def text_changed(self):
+        return self.__dict__.get('text') not in (
+            self._stored_text, self._body_text)
+
+    @property
+    def full_text(self):
+        if not self.long_text or self.text_changed():
+            return self.text
+        if self._body_text is None:
+            self._body_text = self.body.text
+        return self._body_text
+
+    def cut_text(self):
+        """Оставляет в text начало текста и возвращает текст целиком."""
+        text = self.text
+        limit = settings.COMPRESSED_TEXT_THRESHOLD
+        self.long_text = len(text) >= limit
+        self._stored_text = self.text = text[:limit]
+        self._body_text = text if self.long_text else None
+        return text
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if not self.text_changed() or (
+                update_fields is not None and 'text' not in update_fields):
+            return super().save(*args, **kwargs)
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'long_text'}
+        was_long = self.long_text
+        body_model = self.body_model()
+        with transaction.atomic(using=kwargs.get('using')):
+            text = self.cut_text()
+            try:
+                super().save(*args, **kwargs)
+            finally:
+                self.text = text
+            if self.long_text:
+                body_model.objects.update_or_create(
+                    pk=self.pk, defaults={'text': text})
+            elif was_long:
+                body_model.objects.filter(pk=self.pk).delete()
+
+
+class Post(LongTextModel):
     text = models.TextField('Текст поста', help_text='Введите текст поста')
+    excerpt = models.TextField(
+        'Начало текста',
+        blank=True,
+        editable=False
+    )
+    excerpt_html = models.TextField(
+        'Начало текста в HTML',
+        blank=True,
+        editable=False
+    )
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True,
@@ -27,8 +155,40 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=content_storage,
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    image_color = models.CharField(
+        'Основной цвет картинки',
+        max_length=7,
+        blank=True,
+        editable=False
+    )
+    image_variants = models.JSONField(
+        'Варианты картинки',
+        default=dict,
+        blank=True,
+        editable=False
+    )
+    hidden = models.BooleanField(
+        'Скрыт до удаления',
+        default=False,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
@@ -39,17 +199,35 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def fill_excerpt(self):
+        self.excerpt, self.excerpt_html = make_excerpt(self.text)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if 'text' not in self.get_deferred_fields() and (
+                update_fields is None or 'text' in update_fields):
+            self.fill_excerpt()
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'excerpt', 'excerpt_html'}
+        super().save(*args, **kwargs)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, max_length=100)
     description = models.TextField(max_length=400)
+    hidden = models.BooleanField(
+        'Скрыта до удаления',
+        default=False,
+        editable=False
+    )
 
     def __str__(self):
         return self.title
 
 
-class Comment(models.Model):
+class Comment(LongTextModel):
     post = models.ForeignKey(
         Post,
         blank=True,
@@ -70,9 +248,12 @@ class Comment(models.Model):
     )
     created = models.DateTimeField(
         verbose_name='Дата комментария',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
     )
 
+    objects = LongTextQuerySet.as_manager()
+
     class Meta:
         ordering = ('-created',)
         default_related_name = 'comments'
@@ -81,6 +262,38 @@ class Comment(models.Model):
         return self.text
 
 
+class PostBody(models.Model):
+    """Полный текст длинной записи (см. LongTextModel)."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='body',
+        verbose_name='Пост'
+    )
+    text = CompressedTextField('Текст поста')
+
+    class Meta:
+        verbose_name = 'Полный текст поста'
+        verbose_name_plural = 'Полные тексты постов'
+
+
+class CommentBody(models.Model):
+    """Полный текст длинного комментария (см. LongTextModel)."""
+    comment = models.OneToOneField(
+        Comment,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='body',
+        verbose_name='Комментарий'
+    )
+    text = CompressedTextField('Текст')
+
+    class Meta:
+        verbose_name = 'Полный текст комментария'
+        verbose_name_plural = 'Полные тексты комментариев'
+
+
 class Follow(models.Model):
     user = models.ForeignKey(User, related_name='follower',
                              on_delete=models.CASCADE,
@@ -88,3 +301,122 @@ class Follow(models.Model):
     author = models.ForeignKey(User, related_name='following',
                                on_delete=models.CASCADE,
                                verbose_name='Автор')
+
+
+class ArchivedPostQuerySet(models.QuerySet):
+    def visible(self):
+        return self.exclude(author__in=users_being_deleted())
+
+
+class ArchivedPost(models.Model):
+    """
+    Запись старше ARCHIVE_AFTER_DAYS (manage.py archive_posts): те же
+    поля и тот же pk, что были у Post, но в отдельной таблице.
+    """
+    text = CompressedTextField('Текст поста')
+    excerpt = models.TextField('Начало текста', blank=True)
+    excerpt_html = models.TextField('Начало текста в HTML', blank=True)
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        storage=content_storage,
+        blank=True
+    )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True)
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True)
+    image_color = models.CharField(
+        'Основной цвет картинки', max_length=7, blank=True)
+    image_variants = models.JSONField(
+        'Варианты картинки', default=dict, blank=True)
+
+    objects = ArchivedPostQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-pub_date',)
+        default_related_name = 'archived_posts'
+        verbose_name = 'Пост в архиве'
+        verbose_name_plural = 'Посты в архиве'
+
+    def __str__(self):
+        return self.text[:15]
+
+    @property
+    def full_text(self):
+        return self.text
+
+
+class ArchivedComment(models.Model):
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост c комментарием'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='archived_comments',
+        verbose_name='Автор комментария'
+    )
+    text = CompressedTextField('Текст')
+    created = models.DateTimeField('Дата комментария', db_index=True)
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Комментарий в архиве'
+        verbose_name_plural = 'Комментарии в архиве'
+
+    def __str__(self):
+        return self.text
+
+    @property
+    def full_text(self):
+        return self.text
+
+
+class Deletion(models.Model):
+    """Фоновое удаление объекта вместе со связанными строками."""
+    label = models.CharField('Модель', max_length=100)
+    object_id = models.PositiveIntegerField('Объект')
+    title = models.CharField('Название', max_length=200)
+    progress = models.JSONField('Удалено строк', default=dict, blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    finished = models.DateTimeField('Завершено', null=True, blank=True)
+    error = models.TextField('Ошибка', blank=True)
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Удаление'
+        verbose_name_plural = 'Удаления'
+        indexes = (
+            models.Index(fields=('label', 'finished')),
+        )
+
+    def __str__(self):
+        return f'{self.label} {self.title}'
+
+
+def users_being_deleted():
+    """
+    id пользователей, удаление которых не завершено. Их записи и
+    комментарии скрыты сразу; is_active только закрывает вход.
+    """
+    return Deletion.objects.filter(
+        label='auth.user', finished=None).values('object_id')
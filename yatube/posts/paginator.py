@@ -0,0 +1,118 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import close_old_connections
+from django.utils.functional import SimpleLazyObject, cached_property
+
+logger = logging.getLogger(__name__)
+
+executor = SimpleLazyObject(lambda: ThreadPoolExecutor(
+    max_workers=settings.FEED_COUNT_WORKERS,
+    thread_name_prefix='feed-counts',
+))
+
+
+def count_key(name):
+    return f'feed-count:{name}'
+
+
+def store_count(name, count):
+    cache.set(
+        count_key(name), (count, time.time() + settings.FEED_COUNT_REFRESH),
+        settings.FEED_COUNT_TIMEOUT)
+
+
+def recount(name, object_list):
+    close_old_connections()
+    try:
+        store_count(name, object_list.count())
+    except Exception:
+        logger.exception('Не удалось пересчитать ленту %s', name)
+    finally:
+        close_old_connections()
+
+
+def cached_count(name, object_list):
+    """
+    Число записей ленты из кэша. Устаревшее значение отдается как есть,
+    а пересчет уходит в фоновый пул; без пула (FEED_COUNT_WORKERS = 0)
+    лента пересчитывается сразу.
+    """
+    entry = cache.get(count_key(name))
+    if entry is None:
+        count = object_list.count()
+        store_count(name, count)
+        return count
+    count, refresh_at = entry
+    if time.time() >= refresh_at:
+        # Отметка сдвигается сразу, чтобы пересчет запустил один запрос.
+        store_count(name, count)
+        if settings.FEED_COUNT_WORKERS:
+            executor.submit(recount, name, object_list)
+        else:
+            count = object_list.count()
+            store_count(name, count)
+    return count
+
+
+def forget_counts(*names):
+    cache.delete_many([count_key(name) for name in names])
+
+
+def stale_counts(*names):
+    """
+    Помечает числа устаревшими: до пересчета в фоне лента показывает
+    прежнее число, а не считает записи синхронно.
+    """
+    entries = cache.get_many([count_key(name) for name in names])
+    cache.set_many(
+        {key: (count, 0) for key, (count, _) in entries.items()},
+        settings.FEED_COUNT_TIMEOUT)
+
+
+class WindowedPaginator(Paginator):
+    """
+    Paginator, у страниц которого есть window: первая и последняя
+    страницы и PAGINATOR_WINDOW страниц вокруг текущей, None на месте
+    пропуска. Шаблон выводит O(окна) ссылок, а не все страницы. С
+    count_name число записей берется из cached_count.
+    """
+    def __init__(self, object_list, per_page, *args, count_name=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, *args, **kwargs)
+        self.count_name = count_name
+
+    @cached_property
+    def count(self):
+        if self.count_name is None:
+            return super().count
+        return cached_count(self.count_name, self.object_list)
+
+    def page_window(self, number):
+        return [
+            None if page == self.ELLIPSIS else page
+            for page in self.get_elided_page_range(
+                number, on_each_side=settings.PAGINATOR_WINDOW, on_ends=1)
+        ]
+
+    def _get_page(self, *args, **kwargs):
+        # Тип страницы остается Page: window — просто атрибут.
+        page = super()._get_page(*args, **kwargs)
+        page.window = self.page_window(page.number)
+        return page
+
+
+class EstimatedCountPaginator(WindowedPaginator):
+    """
+    Для админки: число строк всей таблицы берется из cached_count, как
+    у лент. С фильтрами или поиском считается точно — такой COUNT
+    ограничен условием.
+    """
+    def __init__(self, object_list, per_page, *args, **kwargs):
+        super().__init__(object_list, per_page, *args, **kwargs)
+        if not object_list.query.where:
+            self.count_name = f'admin:{object_list.model._meta.label_lower}'
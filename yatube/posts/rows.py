@@ -0,0 +1,215 @@
+from .models import ArchivedPost, Group, Post, User, content_storage
+
+# Полный текст лентам не нужен: показывается excerpt_html.
+POST_FIELDS = (
+    'id', 'excerpt_html', 'pub_date', 'image', 'image_color',
+    'image_variants',
+)
+AUTHOR_FIELDS = (
+    'author_id', 'author__username', 'author__first_name',
+    'author__last_name',
+)
+GROUP_FIELDS = ('group_id', 'group__slug', 'group__title')
+
+
+class Row:
+    """
+    Строка ленты только для чтения. Равна строке того же типа и объекту
+    своей модели с тем же pk, как и сами модели.
+    """
+    __slots__ = ('pk',)
+    model = None
+
+    @property
+    def id(self):
+        return self.pk
+
+    def __eq__(self, other):
+        if isinstance(other, (type(self), self.model)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __repr__(self):
+        return f'<{type(self).__name__}: {self.pk}>'
+
+
+class AuthorRow(Row):
+    __slots__ = ('username', 'first_name', 'last_name')
+    model = User
+
+    def __init__(self, pk, username, first_name, last_name):
+        self.pk = pk
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+    def __str__(self):
+        return self.username
+
+
+class GroupRow(Row):
+    __slots__ = ('slug', 'title')
+    model = Group
+
+    def __init__(self, pk, slug, title):
+        self.pk = pk
+        self.slug = slug
+        self.title = title
+
+    def __str__(self):
+        return self.title
+
+
+class ImageRow:
+    """Замена ImageFieldFile для шаблонов и sorl: имя, хранилище, url."""
+    __slots__ = ('name',)
+    storage = content_storage
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def url(self):
+        return self.storage.url(self.name)
+
+    def __bool__(self):
+        return bool(self.name)
+
+    def __eq__(self, other):
+        return self.name == getattr(other, 'name', other)
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __str__(self):
+        return self.name or ''
+
+
+class PostRow(Row):
+    __slots__ = (
+        'excerpt_html', 'pub_date', 'image', 'image_color',
+        'image_variants', 'author', 'group', '_text',
+    )
+    model = Post
+
+    def __init__(self, pk, excerpt_html, pub_date, image, image_color,
+                 image_variants, author, group):
+        self.pk = pk
+        self.excerpt_html = excerpt_html
+        self.pub_date = pub_date
+        self.image = ImageRow(image)
+        self.image_color = image_color
+        self.image_variants = image_variants
+        self.author = author
+        self.group = group
+
+    @property
+    def text(self):
+        """Как отложенное поле модели: загружается при первом обращении."""
+        try:
+            return self._text
+        except AttributeError:
+            self._text = self.model._default_manager.values_list(
+                'text', flat=True).get(pk=self.pk)
+            return self._text
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedPostRow(PostRow):
+    __slots__ = ()
+    model = ArchivedPost
+
+
+class FeedRows:
+    """
+    Записи ленты для Paginator: срез загружается через values_list только
+    с нужными шаблону колонками и собирается в PostRow. Известные заранее
+    автор или группа не выбираются и общие для всех строк.
+    """
+    def __init__(self, queryset, author=None, group=None, row=PostRow):
+        self.queryset = queryset
+        self.author = author
+        self.group = group
+        self.row = row
+
+    def count(self):
+        return self.queryset.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        fields = POST_FIELDS
+        if self.author is None:
+            fields += AUTHOR_FIELDS
+        if self.group is None:
+            fields += GROUP_FIELDS
+        values = self.queryset.values_list(*fields)
+        if isinstance(index, slice):
+            return self.build(values[index])
+        return self.build([values[index]])[0]
+
+    def build(self, values):
+        # Автор и группа создаются по разу на страницу.
+        authors, groups = {}, {}
+        rows = []
+        size = len(POST_FIELDS)
+        for value in values:
+            rest = value[size:]
+            author = self.author
+            if author is None:
+                author = authors.get(rest[0])
+                if author is None:
+                    author = authors[rest[0]] = AuthorRow(*rest[:4])
+                rest = rest[4:]
+            group = self.group
+            if group is None and rest[0] is not None:
+                group = groups.get(rest[0])
+                if group is None:
+                    group = groups[rest[0]] = GroupRow(*rest[:3])
+            rows.append(self.row(*value[:size], author, group))
+        return rows
+
+
+class ChainedRows:
+    """
+    Несколько лент подряд, например горячие записи и затем архив: срез
+    берется из тех частей, на которые попадает. counts — известные
+    заранее размеры частей, иначе каждая считается своим COUNT.
+    """
+    def __init__(self, *parts, counts=None):
+        self.parts = parts
+        self.counts = counts
+
+    def part_counts(self):
+        if self.counts is None:
+            self.counts = [part.count() for part in self.parts]
+        return self.counts
+
+    def count(self):
+        return sum(self.part_counts())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            if index < 0:
+                index += self.count()
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(self.count())
+        rows = []
+        for part, size in zip(self.parts, self.part_counts()):
+            if start < size and stop > 0:
+                rows += part[max(start, 0):min(stop, size)]
+            start -= size
+            stop -= size
+        return rows
@@ -0,0 +1,66 @@
+from core.storage import track_references
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from .events import author_channel, event_bus, post_channel
+from .following import forget_following
+from .models import ArchivedPost, Comment, Follow, Post
+from .paginator import stale_counts
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment(sender, instance, created, **kwargs):
+    if not created or instance.post_id is None:
+        return
+    event = {
+        'type': 'comment',
+        'id': instance.pk,
+        'post': instance.post_id,
+        'author': instance.author.username if instance.author else '',
+        'author_url': reverse(
+            'posts:profile', args=(instance.author.username,)
+        ) if instance.author else '',
+        'text': instance.full_text,
+    }
+    transaction.on_commit(
+        lambda: event_bus.publish(post_channel(instance.post_id), event))
+
+
+@receiver(post_save, sender=Post)
+def publish_post(sender, instance, created, **kwargs):
+    if not created:
+        return
+    event = {
+        'type': 'post',
+        'id': instance.pk,
+        'author': instance.author.username,
+        'url': reverse('posts:post_detail', args=(instance.pk,)),
+    }
+    transaction.on_commit(
+        lambda: event_bus.publish(author_channel(instance.author_id), event))
+
+
+@receiver(post_save, sender=Follow)
+def add_following(sender, instance, created, **kwargs):
+    if created:
+        forget_following(instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_following(sender, instance, **kwargs):
+    forget_following(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def forget_feed_counts(sender, instance, **kwargs):
+    if kwargs.get('created') is False:
+        return
+    stale_counts(
+        'index', f'group:{instance.group_id}', 'admin:posts.post')
+
+
+track_references(Post, 'image')
+track_references(ArchivedPost, 'image')
@@ -0,0 +1,51 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.functional import SimpleLazyObject
+
+from .images import build_variants
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+executor = SimpleLazyObject(lambda: ThreadPoolExecutor(
+    max_workers=settings.POST_IMAGE_VARIANTS_WORKERS,
+    thread_name_prefix='image-variants',
+))
+
+
+def generate_variants(post_id, overwrite=False):
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    try:
+        variants = build_variants(post.image, overwrite)
+    except (OSError, ValueError):
+        logger.exception('Не удалось нарезать картинку записи %s', post_id)
+        return
+    Post.objects.filter(pk=post_id, image=post.image.name).update(
+        image_variants=variants)
+
+
+def run_in_worker(post_id):
+    close_old_connections()
+    try:
+        generate_variants(post_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(post):
+    """
+    Ставит нарезку картинки в фоновый пул после коммита.
+    При POST_IMAGE_VARIANTS_WORKERS = 0 нарезка выполняется сразу.
+    """
+    if not post.image:
+        return
+    if settings.POST_IMAGE_VARIANTS_WORKERS:
+        transaction.on_commit(
+            lambda: executor.submit(run_in_worker, post.pk))
+    else:
+        transaction.on_commit(lambda: generate_variants(post.pk))
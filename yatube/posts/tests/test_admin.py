@@ -0,0 +1,58 @@
+from core.queries import QueryBudgetMixin
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+from posts.paginator import count_key
+
+
+class AdminPerformanceTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', password='password')
+        cls.authors = [
+            User.objects.create_user(username=f'author_{number}')
+            for number in range(3)
+        ]
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {number}', slug=f'group_{number}',
+                description='Описание')
+            for number in range(3)
+        ]
+        Post.objects.bulk_create(
+            Post(author=cls.authors[number % 3],
+                 group=cls.groups[number % 3], text=f'Запись {number}')
+            for number in range(12))
+        post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author, text='Комментарий')
+            for author in cls.authors)
+        for author in cls.authors[1:]:
+            Follow.objects.create(user=cls.authors[0], author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_changelists_without_n_plus_one(self):
+        """Списки в админке не делают запрос на каждую строку"""
+        for model in ('post', 'comment', 'follow'):
+            url = reverse(f'admin:posts_{model}_changelist')
+            with self.subTest(model=model):
+                with self.assertQueryBudget():
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertContains(response, '<select name="form-0-group"')
+
+    def test_post_count_estimated(self):
+        """Число записей без фильтров берется из кэша"""
+        url = reverse('admin:posts_post_changelist')
+        self.client.get(url)
+        cache.set(count_key('admin:posts.post'), (1000, float('inf')))
+        response = self.client.get(url)
+        self.assertEqual(response.context['cl'].result_count, 1000)
+        response = self.client.get(url, {'q': 'author_1'})
+        self.assertEqual(response.context['cl'].result_count, 4)
@@ -0,0 +1,128 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from core.models import Blob
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from posts.deletion import schedule_deletion
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, DELETION_WORKERS=0)
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.old = Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Старая запись {number}')
+            for number in range(12))
+        cls.old_image = Post.objects.create(
+            author=cls.author, text='Старая с картинкой',
+            image=SimpleUploadedFile('old.gif', SMALL_GIF, 'image/gif'))
+        old = timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+        for post in Post.objects.all():
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=old - timedelta(days=100 - post.pk))
+        cls.new = Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Новая запись {number}')
+            for number in range(3))
+        cls.comment = Comment.objects.create(
+            post=cls.old[0], author=cls.author, text='Комментарий')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_posts', *args, stdout=out)
+        return out.getvalue()
+
+    def test_old_posts_moved(self):
+        """Старые записи с комментариями переносятся в архив"""
+        blob = Blob.objects.get(name=self.old_image.image.name)
+        self.archive()
+        self.assertEqual(
+            set(Post.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.new})
+        self.assertEqual(ArchivedPost.objects.count(), 13)
+        archived = ArchivedPost.objects.get(pk=self.old[0].pk)
+        self.assertEqual(archived.text, self.old[0].text)
+        self.assertEqual(archived.excerpt, self.old[0].excerpt)
+        self.assertEqual(list(archived.comments.values_list(
+            'pk', 'text')), [(self.comment.pk, self.comment.text)])
+        self.assertFalse(Comment.objects.exists())
+        blob.refresh_from_db()
+        self.assertEqual(blob.refs, 1)
+
+    def test_archive_incremental(self):
+        """Запуск с --limit продолжается со следующей записи"""
+        output = self.archive('--limit', '5', '--batch-size', '2')
+        self.assertIn('Перенесено записей: 5', output)
+        self.assertEqual(
+            list(ArchivedPost.objects.order_by('pk').values_list(
+                'pk', flat=True)),
+            [post.pk for post in self.old[:5]])
+        self.archive()
+        self.assertEqual(ArchivedPost.objects.count(), 13)
+        self.assertIn('Записей для архива нет', self.archive())
+
+    def test_post_detail_falls_back_to_archive(self):
+        """Архивная запись открывается по прежнему адресу"""
+        self.archive()
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.old[0].pk,)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['post'].text, self.old[0].text)
+        self.assertEqual(response.context['post'].author_posts_count, 16)
+        self.assertEqual(
+            [comment.pk for comment in response.context['comments']],
+            [self.comment.pk])
+        response = self.client.get(
+            reverse('posts:post_fragments', args=(self.old[0].pk,)))
+        self.assertNotIn('comment_form', response.json())
+
+    def test_profile_continues_with_archive(self):
+        """Профиль показывает сначала новые записи, затем архив"""
+        self.archive()
+        url = reverse('posts:profile', args=(self.author.username,))
+        response = self.client.get(url)
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.count, 16)
+        self.assertEqual(
+            [post.pk for post in page],
+            [post.pk for post in self.new[::-1]]
+            + [post.pk for post in ArchivedPost.objects.all()[:7]])
+        response = self.client.get(url, {'page': 2})
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [post.pk for post in ArchivedPost.objects.all()[7:]])
+
+    def test_archive_deleted_with_author(self):
+        """Удаление автора удаляет и его архив"""
+        self.archive()
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_deletion(self.author)
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(ArchivedComment.objects.exists())
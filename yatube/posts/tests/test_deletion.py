@@ -0,0 +1,194 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from core.models import Blob
+from core.queries import QueryLog
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts.deletion import Cascade, schedule_deletion
+from posts.models import Comment, Deletion, Follow, Group, Post, User
+from posts.tasks import generate_variants
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, DELETION_WORKERS=0)
+class DeletionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.posts = Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Запись {number}')
+            for number in range(5))
+        cls.other = Post.objects.create(
+            author=cls.reader, group=cls.group, text='Чужая запись')
+        Comment.objects.bulk_create(
+            Comment(post=post, author=cls.reader, text='Комментарий')
+            for post in cls.posts)
+        Comment.objects.create(
+            post=cls.other, author=cls.author, text='Ответ автора')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.author, author=cls.reader)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_user_hidden_then_deleted(self):
+        """Пользователь скрыт сразу, а удаляется после коммита"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            deletion = schedule_deletion(self.author)
+        response = self.client.get(
+            reverse('posts:profile', args=(self.author.username,)))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.posts[0].pk,)))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']), [self.other])
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.other.pk,)))
+        self.assertEqual(list(response.context['comments']), [])
+        self.assertTrue(Post.objects.filter(author=self.author).exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(list(Post.objects.all()), [self.other])
+        self.assertFalse(Comment.objects.filter(post__isnull=False).exclude(
+            post=self.other).exists())
+        self.assertFalse(Comment.objects.filter(post=self.other).exists())
+        self.assertFalse(Follow.objects.exists())
+        deletion.refresh_from_db()
+        self.assertIsNotNone(deletion.finished)
+        self.assertEqual(deletion.progress, {
+            'auth.user': 1, 'posts.post': 5, 'posts.comment': 6,
+            'posts.follow': 2,
+        })
+
+    def test_deactivated_user_stays_visible(self):
+        """Снятый флаг «активен» закрывает вход, но не скрывает записи"""
+        User.objects.filter(pk=self.author.pk).update(is_active=False)
+        response = self.client.get(
+            reverse('posts:profile', args=(self.author.username,)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Post.objects.visible().filter(
+            author=self.author).count(), 5)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.other.pk,)))
+        self.assertEqual(len(response.context['comments']), 1)
+
+    def test_deleted_in_batches(self):
+        """Связанные строки удаляются пачками, ход виден в Deletion"""
+        User.objects.filter(pk=self.author.pk).update(is_active=False)
+        deletion = Deletion.objects.create(
+            label='auth.user', object_id=self.author.pk, title='author')
+        reported = []
+        with QueryLog() as log:
+            done = Cascade(
+                deletion, batch_size=2,
+                report=lambda label, count: reported.append(
+                    (label, count))).run()
+        self.assertTrue(done)
+        deletes = [
+            sql for sql in log.queries
+            if sql.startswith('DELETE FROM "posts_post"')]
+        self.assertEqual(len(deletes), 3)
+        self.assertIn(('posts.post', 2), reported)
+        self.assertIn(('posts.post', 5), reported)
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.progress['posts.post'], 5)
+
+    def test_group_posts_kept(self):
+        """Записи удаленной группы остаются без группы"""
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_deletion(self.group)
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group=None).count(), 6)
+
+    def test_hidden_group_not_found(self):
+        """Скрытая группа недоступна до удаления"""
+        with self.captureOnCommitCallbacks():
+            schedule_deletion(self.group)
+        response = self.client.get(
+            reverse('posts:group', args=(self.group.slug,)))
+        self.assertEqual(response.status_code, 404)
+
+    def post_with_image(self):
+        post = Post.objects.create(
+            author=self.author, text='С картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'))
+        generate_variants(post.pk)
+        post.refresh_from_db()
+        return post
+
+    @override_settings(MEDIA_UPLOAD_GRACE=-1)
+    def test_images_removed(self):
+        """Файл картинки удаляется, если на него нет других ссылок"""
+        post = self.post_with_image()
+        name = post.image.name
+        variants = post.image_variants['names']
+        self.assertTrue(all(map(default_storage.exists, variants)))
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_deletion(post)
+        self.assertFalse(Blob.objects.filter(name=name).exists())
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(any(map(default_storage.exists, variants)))
+
+    @override_settings(MEDIA_UPLOAD_GRACE=-1)
+    def test_shared_image_variants_kept(self):
+        """Нарезки общей картинки остаются у другой записи"""
+        post = self.post_with_image()
+        other = self.post_with_image()
+        variants = other.image_variants['names']
+        self.assertEqual(post.image_variants['names'], variants)
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_deletion(post)
+        self.assertTrue(default_storage.exists(other.image.name))
+        self.assertTrue(all(map(default_storage.exists, variants)))
+
+    def test_admin_deletes_in_background(self):
+        """Админка спрашивает подтверждение по числам и удаляет в фоне"""
+        admin = User.objects.create_superuser(
+            username='admin', password='password')
+        self.client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=(self.author.pk,))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        model_count = dict(response.context['model_count'])
+        self.assertEqual(model_count[Post._meta.verbose_name_plural], 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'post': 'yes'})
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertTrue(Deletion.objects.filter(
+            label='auth.user', finished__isnull=False).exists())
+
+    def test_run_deletions_resumes(self):
+        """run_deletions доводит до конца незавершенные удаления"""
+        Deletion.objects.create(
+            label='posts.post', object_id=self.other.pk, title='other')
+        out = StringIO()
+        call_command('run_deletions', stdout=out)
+        self.assertFalse(Post.objects.filter(pk=self.other.pk).exists())
+        self.assertIn('posts.post: 1', out.getvalue())
@@ -0,0 +1,60 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.management.commands.send_digests import build_messages
+from posts.models import Follow, Post, User
+
+
+class DigestTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='post_author')
+        cls.follower = User.objects.create_user(
+            username='follower', email='follower@yatube.ru')
+        cls.no_email = User.objects.create_user(username='no_email')
+        cls.stranger = User.objects.create_user(
+            username='stranger', email='stranger@yatube.ru')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        Follow.objects.create(user=cls.no_email, author=cls.author)
+        cls.post = Post.objects.create(
+            text='Свежая запись для дайджеста',
+            author=cls.author,
+        )
+
+    def test_digest_sent_to_followers_only(self):
+        """Дайджест получают только подписчики с почтой"""
+        call_command('send_digests', period='daily', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.follower.email])
+        self.assertIn(self.post.text, mail.outbox[0].body)
+
+    def test_old_posts_skipped(self):
+        """Старые записи не попадают в дайджест"""
+        Post.objects.filter(pk=self.post.pk).update(
+            pub_date=timezone.now() - timedelta(days=3))
+        call_command('send_digests', period='daily', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_one_query_per_chunk(self):
+        """Записи пачки пользователей выбираются одним запросом"""
+        users = [
+            (user.pk, user.username, user.email)
+            for user in (self.follower, self.stranger)
+        ]
+        since = timezone.now() - timedelta(days=1)
+        with self.assertNumQueries(1):
+            messages = build_messages(users, since)
+        self.assertEqual(len(messages), 1)
+
+    def test_long_post_excerpt(self):
+        """В письмо попадает начало длинной записи, а не весь текст"""
+        post = Post.objects.create(text='слово ' * 1000, author=self.author)
+        call_command('send_digests', period='daily', stdout=StringIO())
+        self.assertIn(post.excerpt, mail.outbox[0].body)
+        self.assertNotIn(post.text, mail.outbox[0].body)
@@ -0,0 +1,83 @@
+import json
+
+from django.test import Client, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from posts.events import LocalEventBus, event_bus, post_channel
+from posts.models import Comment, Post, User
+
+
+class EventBusTest(TestCase):
+    def test_publish_fans_out_to_subscribers(self):
+        """Событие получают все подписчики канала"""
+        bus = LocalEventBus()
+        event = {'type': 'comment', 'id': 1}
+        with bus.subscribe(['post-1']) as first:
+            with bus.subscribe(['post-1', 'post-2']) as second:
+                bus.publish('post-1', event)
+                bus.publish('post-3', {'type': 'comment', 'id': 3})
+                self.assertEqual(first.get(0), event)
+                self.assertEqual(second.get(0), event)
+                self.assertIsNone(second.get(0))
+        self.assertFalse(bus._subscribers)
+
+    def test_full_queue_drops_events(self):
+        """Переполненная очередь не блокирует публикацию"""
+        bus = LocalEventBus(queue_size=1)
+        with bus.subscribe(['post-1']) as subscription:
+            bus.publish('post-1', {'id': 1})
+            bus.publish('post-1', {'id': 2})
+            self.assertEqual(subscription.get(0), {'id': 1})
+            self.assertIsNone(subscription.get(0))
+
+
+@override_settings(EVENT_STREAM_KEEPALIVE=0.01, EVENT_STREAM_LIFETIME=1)
+class EventStreamViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def test_post_events_not_under_wsgi(self):
+        """Под WSGI поток не открывается, чтобы не держать рабочий поток"""
+        response = Client().get(
+            reverse('posts:post_events', kwargs={'post_id': self.post.pk}))
+        self.assertEqual(response.status_code, 204)
+
+    async def test_post_events_async_stream(self):
+        """Под ASGI поток ждет события в event loop"""
+        response = await self.async_client.get(
+            reverse('posts:post_events', kwargs={'post_id': self.post.pk}))
+        stream = response.streaming_content
+        self.assertEqual(await stream.__anext__(), b'retry: 5000\n\n')
+        event_bus.publish(
+            post_channel(self.post.pk), {'type': 'comment', 'id': 8})
+        chunk = (await stream.__anext__()).decode()
+        await stream.aclose()
+        self.assertEqual(json.loads(chunk.split('data: ')[1])['id'], 8)
+
+    def test_post_events_unknown_post(self):
+        """Поток несуществующей записи возвращает 404"""
+        response = Client().get(
+            reverse('posts:post_events', kwargs={'post_id': 0}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_follow_events_requires_login(self):
+        """Поток ленты подписок доступен только авторизованным"""
+        response = Client().get(reverse('posts:follow_events'))
+        self.assertEqual(response.status_code, 302)
+
+
+class CommentSignalTest(TransactionTestCase):
+    def test_comment_published_after_commit(self):
+        """Новый комментарий публикуется в канал записи"""
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(text='Тестовый пост', author=user)
+        with event_bus.subscribe([post_channel(post.pk)]) as subscription:
+            comment = Comment.objects.create(
+                post=post, author=user, text='Комментарий')
+            event = subscription.get(1)
+        self.assertEqual(event['id'], comment.pk)
+        self.assertEqual(event['author'], user.username)
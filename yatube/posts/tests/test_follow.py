@@ -1,7 +1,9 @@
 from django.test import Client, TestCase
+from django.template import engines
 from django.urls import reverse
 from django.core.cache import cache
 
+from posts.following import following_ids, following_key
 from posts.models import Follow, Post, User
 
 
@@ -72,3 +74,65 @@ class FollowTest(TestCase):
         response = self.author_client.get(
             reverse('posts:follow_index'))
         self.assertNotIn(post, response.context['page_obj'])
+
+
+class FollowingCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=cls.follower, author=cls.other)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def fresh_follower(self):
+        return User.objects.get(pk=self.follower.pk)
+
+    def test_loaded_once(self):
+        """Подписки загружаются одним запросом и дальше берутся из кэша"""
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                following_ids(self.follower), {self.other.pk})
+            following_ids(self.follower)
+        follower = self.fresh_follower()
+        with self.assertNumQueries(0):
+            self.assertEqual(following_ids(follower), {self.other.pk})
+
+    def test_follow_unfollow_reset_cache(self):
+        following_ids(self.follower)
+        self.client.post(
+            reverse('posts:profile_follow', args=[self.author.username]))
+        self.assertIsNone(cache.get(following_key(self.follower.pk)))
+        self.assertEqual(
+            following_ids(self.fresh_follower()),
+            {self.author.pk, self.other.pk})
+        self.client.post(
+            reverse('posts:profile_unfollow', args=[self.other.username]))
+        self.assertIsNone(cache.get(following_key(self.follower.pk)))
+        self.assertEqual(
+            following_ids(self.fresh_follower()), {self.author.pk})
+        response = self.client.get(
+            reverse('posts:profile_fragments', args=[self.author.username]))
+        self.assertIn('Отписаться', response.json()['follow'])
+
+    def test_follows_filter(self):
+        templates = {
+            'django': '{% load user_filters %}'
+                      '{% for a in authors %}{{ user|follows:a }} '
+                      '{% endfor %}',
+            'jinja2': '{% for a in authors %}{{ user|follows(a) }} '
+                      '{% endfor %}',
+        }
+        context = {
+            'user': self.fresh_follower(),
+            'authors': [self.author, self.other, self.follower],
+        }
+        for engine, source in templates.items():
+            with self.subTest(engine=engine):
+                template = engines[engine].from_string(source)
+                self.assertEqual(
+                    template.render(context), 'False True False ')
@@ -1,10 +1,13 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
+from posts.forms import PostForm
 from posts.models import Comment, Group, Post, User
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -74,8 +77,9 @@ class PostFormTest(TestCase):
         self.assertEqual(post.text, form_data['text'])
         self.assertEqual(post.author, self.user)
         self.assertEqual(post.group.pk, form_data['group'])
-        self.assertEqual(post.image.name.split('/')[1],
-                         form_data['image'].name)
+        self.assertTrue(post.image.name.startswith('posts/'))
+        self.assertTrue(post.image.name.endswith('.webp'))
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
 
     def test_post_edit_change_db(self):
         """Происходит изменение поста с post_id в базе данных"""
@@ -131,3 +135,50 @@ class PostFormTest(TestCase):
         self.assertEqual(comment.text, form_data['text'])
         self.assertEqual(comment.post, PostFormTest.post)
         self.assertEqual(comment.author, PostFormTest.user)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_MAX_SIZE=2 ** 20,
+    POST_IMAGE_MAX_SIDE=100,
+)
+class PostImageTest(TestCase):
+    @staticmethod
+    def get_image(size, color='red', fmt='JPEG', exif=None):
+        buffer = BytesIO()
+        image = Image.new('RGB', size, color)
+        if exif is not None:
+            image.save(buffer, fmt, exif=exif)
+        else:
+            image.save(buffer, fmt)
+        return SimpleUploadedFile(
+            name=f'image.{fmt.lower()}',
+            content=buffer.getvalue(),
+            content_type=f'image/{fmt.lower()}',
+        )
+
+    def test_image_reencoded_and_capped(self):
+        """Картинка уменьшается, перекодируется в WebP и теряет EXIF"""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        form = PostForm(
+            data={'text': 'Пост с картинкой'},
+            files={'image': self.get_image((400, 200), exif=exif)},
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        image = form.cleaned_data['image']
+        self.assertTrue(image.name.endswith('.webp'))
+        with Image.open(image) as stored:
+            self.assertEqual(stored.format, 'WEBP')
+            self.assertEqual(stored.size, (100, 50))
+            self.assertFalse(stored.getexif())
+        self.assertEqual(form.instance.image_width, 100)
+        self.assertEqual(form.instance.image_height, 50)
+        self.assertEqual(form.instance.image_color, '#fe0000')
+
+    def test_large_image_rejected(self):
+        """Слишком большой файл не проходит валидацию"""
+        upload = self.get_image((1500, 1500), fmt='BMP')
+        form = PostForm(data={'text': 'Пост'}, files={'image': upload})
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
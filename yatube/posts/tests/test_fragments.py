@@ -0,0 +1,88 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Follow, Group, Post, User
+
+
+class EdgeCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый пост', group=cls.group)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_pages_shared_between_users(self):
+        """Страницы одинаковы для всех и кэшируются прокси"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        for engine in ('django', 'jinja2'):
+            for url in urls:
+                with self.subTest(engine=engine, url=url), override_settings(
+                        FEED_TEMPLATE_ENGINE=engine):
+                    pages = []
+                    for client in (
+                            self.client, self.author_client,
+                            self.reader_client):
+                        cache.clear()
+                        response = client.get(url)
+                        self.assertIn('public', response['Cache-Control'])
+                        self.assertIn('s-maxage', response['Cache-Control'])
+                        self.assertNotIn('Cookie', response.get('Vary', ''))
+                        self.assertFalse(response.cookies)
+                        pages.append(response.content)
+                    self.assertEqual(pages[0], pages[1])
+                    self.assertEqual(pages[0], pages[2])
+                    self.assertNotIn(b'reader', pages[0])
+
+    def test_fragments(self):
+        """Персональное отдается отдельно и не кэшируется"""
+        url = reverse('posts:post_fragments', args=[self.post.pk])
+        for engine in ('django', 'jinja2'):
+            with self.subTest(engine=engine), override_settings(
+                    FEED_TEMPLATE_ENGINE=engine):
+                response = self.author_client.get(url)
+                self.assertIn('private', response['Cache-Control'])
+                data = response.json()
+                self.assertIn('Пользователь: author', data['nav'])
+                self.assertIn(
+                    reverse('posts:post_edit', args=[self.post.pk]),
+                    data['edit'])
+                self.assertIn('csrfmiddlewaretoken', data['comment_form'])
+
+                data = self.reader_client.get(url).json()
+                self.assertEqual(data['edit'].strip(), '')
+                self.assertIn('csrfmiddlewaretoken', data['comment_form'])
+
+                data = self.client.get(url).json()
+                self.assertIn(reverse('users:login'), data['nav'])
+                self.assertEqual(data['comment_form'].strip(), '')
+
+    def test_follow_fragment(self):
+        """Кнопка подписки зависит от пользователя"""
+        url = reverse('posts:profile_fragments', args=[self.author.username])
+        data = self.reader_client.get(url).json()
+        self.assertIn(
+            reverse('posts:profile_unfollow', args=[self.author.username]),
+            data['follow'])
+        data = self.author_client.get(url).json()
+        self.assertIn(
+            reverse('posts:profile_follow', args=[self.author.username]),
+            data['follow'])
@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from core.thumbnail import prefetch_thumbnails, thumbnail_file
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts.models import Post, User
+from sorl.thumbnail import default, get_thumbnail
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_VARIANTS_WORKERS=0,
+    POST_IMAGE_VARIANT_WIDTHS=(320, 640, 960),
+)
+class ImageVariantsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    @staticmethod
+    def get_image(size):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'blue').save(buffer, 'PNG')
+        return SimpleUploadedFile(
+            name='picture.png',
+            content=buffer.getvalue(),
+            content_type='image/png',
+        )
+
+    def test_variants_built_after_upload(self):
+        """После загрузки нарезаются варианты и попадают в srcset"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={'text': 'Пост', 'image': self.get_image((700, 400))},
+            )
+        post = Post.objects.latest('id')
+        variants = post.image_variants
+        self.assertEqual(variants['width'], 640)
+        self.assertEqual(variants['height'], 226)
+        self.assertEqual(variants['jpeg'].count('w,'), 1)
+        self.assertIn('640w', variants['webp'])
+        path = variants['src'][len(settings.MEDIA_URL):]
+        self.assertTrue(os.path.exists(os.path.join(TEMP_MEDIA_ROOT, path)))
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertContains(response, 'srcset="' + variants['jpeg'])
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_command_builds_missing_variants(self):
+        """Команда нарезает картинки записей без вариантов"""
+        post = Post.objects.create(
+            author=self.user, text='Пост', image=self.get_image((100, 50)))
+        call_command('build_image_variants', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants['width'], 320)
+
+    def test_shared_image_shares_variants(self):
+        """Записи с одной картинкой делят нарезки, пересборка их заменяет"""
+        first = Post.objects.create(
+            author=self.user, text='Пост', image=self.get_image((700, 300)))
+        second = Post.objects.create(
+            author=self.user, text='Пост', image=self.get_image((700, 300)))
+        call_command('build_image_variants', '--all', stdout=StringIO())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        names = first.image_variants['names']
+        self.assertEqual(len(names), 4)
+        self.assertEqual(second.image_variants['names'], names)
+        shard = os.path.dirname(first.image.name).split('/', 1)[1]
+        directory = os.path.join(TEMP_MEDIA_ROOT, 'posts', 'variants', shard)
+        self.assertEqual(
+            sorted(os.listdir(directory)),
+            sorted(os.path.basename(name) for name in names))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailStoreTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост {number}',
+                image=ImageVariantsTest.get_image((200, 100)),
+            )
+            for number in range(3)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def forget_local(self):
+        default.kvstore._local.clear()
+        caches[settings.THUMBNAIL_CACHE].clear()
+
+    def test_thumbnail_file_matches_backend(self):
+        """Имя миниатюры считается так же, как в sorl"""
+        post = self.posts[0]
+        expected = get_thumbnail(
+            post.image, '960x339', crop='center', upscale=True)
+        self.assertEqual(
+            thumbnail_file(
+                post.image, '960x339', crop='center', upscale=True).name,
+            expected.name)
+
+    def test_prefetch_in_one_query(self):
+        """Метаданные страницы загружаются одним запросом, затем из LRU"""
+        images = [post.image for post in self.posts]
+        for image in images:
+            get_thumbnail(image, '960x339', crop='center', upscale=True)
+        self.forget_local()
+        with self.assertNumQueries(1):
+            prefetch_thumbnails(
+                images, '960x339', crop='center', upscale=True)
+        caches[settings.THUMBNAIL_CACHE].clear()
+        with self.assertNumQueries(0):
+            for image in images:
+                get_thumbnail(image, '960x339', crop='center', upscale=True)
@@ -0,0 +1,87 @@
+import re
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+LINK_RE = re.compile(r'(?:href|src)="([^"]+)"')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class JinjaFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый пост <b>с разметкой</b>',
+            group=cls.group,
+            image=SimpleUploadedFile(
+                'small.gif', small_gif, content_type='image/gif'),
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Запись {number}')
+            for number in range(settings.COUNT_POSTS)
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def render(self, url, engine):
+        cache.clear()
+        with override_settings(FEED_TEMPLATE_ENGINE=engine):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_jinja_matches_django(self):
+        """Шаблоны Jinja2 выводят те же ссылки и тексты, что и Django."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                django_html = self.render(url, 'django')
+                jinja_html = self.render(url, 'jinja2')
+                self.assertEqual(
+                    LINK_RE.findall(jinja_html), LINK_RE.findall(django_html))
+                self.assertEqual(
+                    jinja_html.count('<article'),
+                    django_html.count('<article'))
+                self.assertNotIn('<b>с разметкой</b>', jinja_html)
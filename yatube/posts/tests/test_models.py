@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from posts.models import Group, Post, User
 
@@ -66,3 +66,33 @@ class GroupModelTest(TestCase):
         group = GroupModelTest.group
         expected_object_name = group.title
         self.assertEqual(str(group), expected_object_name)
+
+
+@override_settings(EXCERPT_LENGTH=20)
+class PostExcerptTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_excerpt_filled_on_save(self):
+        """Начало текста обновляется при сохранении и bulk_create"""
+        post = Post.objects.create(
+            author=self.user, text='Первая строка\nвторая & <длинная>')
+        self.assertEqual(post.excerpt, 'Первая строка\nвтора…')
+        self.assertEqual(
+            post.excerpt_html, '<p>Первая строка<br>втора…</p>')
+        post.text = 'Коротко'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt_html, '<p>Коротко</p>')
+        [post] = Post.objects.bulk_create(
+            [Post(author=self.user, text='<b>' * 10)])
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).excerpt_html,
+            '<p>' + '&lt;b&gt;' * 6 + '&lt;…</p>')
+
+    def test_deferred_text_not_loaded_on_save(self):
+        post = Post.objects.create(author=self.user, text='Текст')
+        post = Post.objects.defer('text').get(pk=post.pk)
+        with self.assertNumQueries(1):
+            post.save(update_fields=['group'])
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from posts.models import Group, Post, User
+from posts.paginator import WindowedPaginator, count_key
+
+
+class WindowedPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Запись {number}')
+            for number in range(5))
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(PAGINATOR_WINDOW=2)
+    def test_window(self):
+        """Ссылки только на края и соседние страницы"""
+        paginator = WindowedPaginator(range(100_000), 1)
+        self.assertEqual(
+            paginator.page(50_000).window,
+            [1, None, 49_998, 49_999, 50_000, 50_001, 50_002, None,
+             100_000])
+        self.assertEqual(paginator.page(1).window, [1, 2, 3, None, 100_000])
+        self.assertEqual(WindowedPaginator(range(3), 1).page(2).window,
+                         [1, 2, 3])
+
+    def test_template_renders_window(self):
+        page = WindowedPaginator(range(100_000), 1).page(50_000)
+        for engine in ('django', 'jinja2'):
+            with self.subTest(engine=engine):
+                html = render_to_string(
+                    'posts/includes/paginator.html', {'page_obj': page},
+                    using=engine)
+                self.assertLess(html.count('<li'), 15)
+                self.assertIn('?page=100000', html)
+                self.assertIn('…', html)
+
+    @override_settings(FEED_COUNT_WORKERS=0)
+    def test_count_cached_and_refreshed(self):
+        """Число записей берется из кэша и обновляется после новой записи"""
+        def count():
+            return WindowedPaginator(
+                Post.objects.all(), 10, count_name='index').count
+
+        self.assertEqual(count(), 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(count(), 5)
+        Post.objects.create(author=self.author, text='Новая')
+        self.assertEqual(count(), 6)
+        Post.objects.filter(text='Новая').update(text='Изменена')
+        Post.objects.bulk_create([Post(author=self.author, text='Тихо')])
+        self.assertEqual(count(), 6)
+        # Срок обновления прошел: без пула пересчет идет сразу.
+        cache.set(count_key('index'), (6, 0))
+        self.assertEqual(count(), 7)
+
+    def test_new_post_marks_count_stale(self):
+        """Новая запись не стирает число, а помечает его к пересчету"""
+        WindowedPaginator(Post.objects.all(), 10, count_name='index').count
+        Post.objects.create(author=self.author, text='Новая')
+        self.assertEqual(cache.get(count_key('index')), (5, 0))
@@ -0,0 +1,94 @@
+from core.queries import QueryBudgetMixin, RequestQueryRecorder, query_shape
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create_user(username=f'author_{number}')
+            for number in range(4)
+        ]
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(
+                author=cls.authors[number % 4],
+                group=cls.group if number % 2 else None,
+                text=f'Запись {number}',
+            )
+            for number in range(15)
+        )
+        cls.post = Post.objects.filter(author=cls.authors[0]).first()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=author, text='Комментарий')
+            for author in cls.authors
+        )
+        for author in cls.authors[:2]:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def test_query_shape(self):
+        """Значения и длина списка IN не меняют вид запроса"""
+        self.assertEqual(
+            query_shape('SELECT * FROM t WHERE id IN (%s, %s)\n  LIMIT 21'),
+            query_shape('SELECT * FROM t WHERE id IN (%s) LIMIT 21'))
+
+    def test_n_plus_one_detected(self):
+        """Повторяющийся в цикле запрос считается N+1"""
+        with self.assertRaisesMessage(AssertionError, 'N+1, 3 раз'):
+            with self.assertQueryBudget():
+                for post in Post.objects.all()[:3]:
+                    post.author.username
+        with self.assertQueryBudget(1):
+            for post in Post.objects.select_related('author')[:3]:
+                post.author.username
+
+    def test_profile_and_detail_assembled_in_few_queries(self):
+        """Профиль — два запроса, запись — не больше трех"""
+        pages = (
+            (reverse('posts:profile', args=[self.authors[0].username]),
+             2, 'Всего постов: 4'),
+            (reverse('posts:post_detail', args=[self.post.pk]),
+             3, '<span >4</span>'),
+        )
+        for url, budget, count in pages:
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertQueryBudget(budget):
+                    response = self.client.get(url)
+                self.assertContains(response, count)
+
+    def test_views_within_budget(self):
+        """Страницы укладываются в QUERY_BUDGETS и обходятся без N+1"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.authors[0].username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+            reverse('posts:fragments'),
+            reverse('posts:profile_fragments',
+                    args=[self.authors[0].username]),
+            reverse('posts:post_fragments', args=[self.post.pk]),
+            reverse('posts:post_create'),
+            reverse('posts:post_edit', args=[self.post.pk]),
+        )
+        for user in (None, self.authors[0], self.reader):
+            client = Client()
+            if user is not None:
+                client.force_login(user)
+            for url in urls:
+                with self.subTest(user=user, url=url):
+                    cache.clear()
+                    with RequestQueryRecorder() as recorder:
+                        client.get(url)
+                    if recorder.violations:
+                        self.fail('\n\n'.join(recorder.violations))
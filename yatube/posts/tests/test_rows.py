@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Group, Post, User
+from posts.rows import AuthorRow, FeedRows, PostRow
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class FeedRowsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='С картинкой',
+            image=SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'))
+        Post.objects.create(author=cls.author, text='Без группы')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_rows_match_models(self):
+        """Строки ленты отдают шаблону то же, что и модели"""
+        rows = FeedRows(Post.objects.all())[:10]
+        posts = list(Post.objects.select_related('author', 'group'))
+        self.assertEqual(rows, posts)
+        for row, post in zip(rows, posts):
+            with self.subTest(post=post.pk):
+                self.assertIsInstance(row, PostRow)
+                self.assertEqual(row.id, post.id)
+                self.assertEqual(row.text, post.text)
+                self.assertEqual(row.pub_date, post.pub_date)
+                self.assertEqual(row.author, post.author)
+                self.assertEqual(
+                    row.author.get_full_name(), post.author.get_full_name())
+                self.assertEqual(row.group, post.group)
+                self.assertEqual(row.image, post.image)
+                self.assertEqual(bool(row.image), bool(post.image))
+        self.assertEqual(rows[1].group.slug, self.group.slug)
+        self.assertEqual(rows[1].image.url, self.post.image.url)
+        self.assertIsNone(rows[0].group)
+        self.assertIs(rows[0].author, rows[1].author)
+
+    def test_only_needed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            FeedRows(Post.objects.all())[:10]
+        [sql] = [query['sql'] for query in queries]
+        self.assertNotIn('password', sql)
+        self.assertNotIn('last_login', sql)
+        self.assertNotIn('"posts_post"."text"', sql)
+        self.assertIn('JOIN', sql)
+
+    def test_known_author_and_group_reused(self):
+        rows = FeedRows(
+            self.author.posts.all(), author=self.author)[:10]
+        self.assertTrue(all(row.author is self.author for row in rows))
+        [row] = FeedRows(self.group.posts.all(), group=self.group)[:10]
+        self.assertIs(row.group, self.group)
+        self.assertIsInstance(row.author, AuthorRow)
+        self.assertEqual(len(FeedRows(Post.objects.all())), 2)
+
+    @override_settings(EXCERPT_LENGTH=50)
+    def test_feed_shows_excerpt(self):
+        """Лента показывает начало записи, полный текст — на ее странице"""
+        post = Post.objects.create(
+            author=self.author, text='Начало ' + 'середина ' * 100 + 'конец')
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Начало середина')
+        self.assertNotContains(response, 'конец')
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk]))
+        self.assertContains(response, 'конец')
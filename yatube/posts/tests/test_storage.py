@@ -0,0 +1,141 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from core.models import Blob
+from core.storage import ContentAddressedStorage
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from posts.models import ArchivedPost, Post, User
+from posts.tasks import generate_variants
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(name, SMALL_GIF, 'image/gif'),
+        )
+
+    def test_identical_uploads_share_blob(self):
+        """Одинаковые файлы хранятся один раз под хэшем содержимого"""
+        first = self.create_post('first.gif')
+        second = self.create_post('SECOND.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        parts = first.image.name.split('/')
+        self.assertEqual(parts[0], 'posts')
+        self.assertEqual(parts[1] + parts[2], parts[3][:4])
+        self.assertTrue(parts[3].endswith('.gif'))
+        blob = Blob.objects.get(name=first.image.name)
+        self.assertEqual(blob.refs, 2)
+        self.assertEqual(blob.size, len(SMALL_GIF))
+
+    def test_gc_removes_unreferenced_files(self):
+        """gc_media удаляет только файлы без ссылок"""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        path = first.image.path
+        first.delete()
+        call_command('gc_media', grace_hours=-1, stdout=StringIO())
+        self.assertTrue(os.path.exists(path))
+        second.image = ''
+        second.save()
+        self.assertEqual(Blob.objects.get(name=first.image.name).refs, 0)
+        call_command('gc_media', grace_hours=-1, stdout=StringIO())
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(Blob.objects.exists())
+
+    def test_gc_removes_variants(self):
+        """Нарезки замененной картинки удаляются вместе с ней"""
+        post = self.create_post('first.gif')
+        generate_variants(post.pk)
+        post.refresh_from_db()
+        variants = post.image_variants['names']
+        self.assertTrue(all(
+            os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name))
+            for name in variants))
+        post.image = SimpleUploadedFile('other.gif', SMALL_GIF + b'\0')
+        post.save()
+        call_command('gc_media', grace_hours=-1, stdout=StringIO())
+        self.assertFalse(any(
+            os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name))
+            for name in variants))
+
+    def test_gc_skips_reuploaded_orphan(self):
+        """Повторная загрузка защищает файл без ссылок от сборщика"""
+        post = self.create_post('first.gif')
+        name = post.image.name
+        post.delete()
+        long_ago = timezone.now() - timedelta(days=2)
+        Blob.objects.filter(name=name).update(
+            created=long_ago, touched=long_ago)
+        # Файл загружен снова, но ссылка на него еще не сохранена.
+        ContentAddressedStorage().save(
+            'posts/again.gif', SimpleUploadedFile('again.gif', SMALL_GIF))
+        call_command('gc_media', stdout=StringIO())
+        self.assertTrue(Blob.objects.filter(name=name).exists())
+        self.assertTrue(os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name)))
+
+    def adopt(self):
+        out = StringIO()
+        call_command('adopt_media', stdout=out)
+        return out.getvalue()
+
+    def test_adopt_legacy_images(self):
+        """adopt_media переносит старые картинки под хэш с числом ссылок"""
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts', 'variants'),
+                    exist_ok=True)
+        for name, content in (('posts/legacy.gif', SMALL_GIF),
+                              ('posts/variants/legacy-320.jpg', b'old')):
+            with open(os.path.join(TEMP_MEDIA_ROOT, name), 'wb') as file:
+                file.write(content)
+        old_variants = {'names': ['posts/variants/legacy-320.jpg']}
+        post = Post.objects.create(
+            author=self.user, text='Старый пост', image='posts/legacy.gif',
+            image_variants=old_variants)
+        archived = ArchivedPost.objects.create(
+            author=self.user, text='Архив', image='posts/legacy.gif',
+            image_variants=old_variants, pub_date=timezone.now())
+        self.assertIn('Перенесено картинок: 1', self.adopt())
+        post.refresh_from_db()
+        archived.refresh_from_db()
+        name = post.image.name
+        self.assertEqual(archived.image.name, name)
+        self.assertNotEqual(name, 'posts/legacy.gif')
+        self.assertEqual(Blob.objects.get(name=name).refs, 2)
+        for old in ('posts/legacy.gif', 'posts/variants/legacy-320.jpg'):
+            self.assertFalse(
+                os.path.exists(os.path.join(TEMP_MEDIA_ROOT, old)))
+        variants = post.image_variants['names']
+        self.assertEqual(archived.image_variants['names'], variants)
+        self.assertTrue(all(
+            os.path.exists(os.path.join(TEMP_MEDIA_ROOT, variant))
+            for variant in variants))
+        self.assertIn('пересобрано нарезок: 0', self.adopt())
@@ -15,7 +15,24 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/events/',
+        views.post_events,
+        name='post_events'
+    ),
+    path('fragments/', views.fragments, name='fragments'),
+    path(
+        'fragments/profile/<str:username>/',
+        views.fragments,
+        name='profile_fragments'
+    ),
+    path(
+        'fragments/posts/<int:post_id>/',
+        views.fragments,
+        name='post_fragments'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/events/', views.follow_events, name='follow_events'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,58 +1,182 @@
+from asgiref.sync import sync_to_async
+from core.streaming import stream_render
+from core.thumbnail import prefetch_thumbnails
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import (Http404, HttpResponse, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
-from posts.decorators import cache_on_auth
+from django.template.loader import render_to_string
+from django.views.decorators.cache import never_cache
+from posts.decorators import (async_login_required, cache_public,
+                              edge_cache)
+from posts.events import aevent_stream, author_channel, post_channel
 from posts.forms import CommentForm, PostForm
+from posts.images import prime_thumbnail_source
+from posts.tasks import schedule_variants
 
 from yatube.settings import COUNT_POSTS
 
-from .models import Follow, Group, Post, User
+from .following import following_ids, is_following
+from .models import (ArchivedPost, Follow, Group, Post, User,
+                     users_being_deleted)
+from .paginator import WindowedPaginator
+from .rows import ArchivedPostRow, ChainedRows, FeedRows
 
+aget_object_or_404 = sync_to_async(get_object_or_404)
 
-@cache_on_auth(20)
-def index(request):
-    posts = Post.objects.select_related('author', 'group')
+
+def render_feed(request, template_name, context):
+    if settings.FEED_STREAMING:
+        return stream_render(
+            request, template_name, context,
+            using=settings.FEED_TEMPLATE_ENGINE)
+    return render(
+        request, template_name, context,
+        using=settings.FEED_TEMPLATE_ENGINE)
+
+
+arender_feed = sync_to_async(render_feed)
+
+
+@cache_public(20)
+async def index(request):
+    posts = FeedRows(Post.objects.visible())
     context = {
-        'page_obj': page_navigator(request, posts),
+        'page_obj': await apage_navigator(
+            request, posts, count_name='index'),
+        'edge_cached': True,
     }
-    return render(request, 'posts/index.html', context)
+    return await arender_feed(request, 'posts/index.html', context)
 
 
-def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author')
+@edge_cache(settings.EDGE_CACHE_TIMEOUT)
+async def group_posts(request, slug):
+    group = await aget_object_or_404(Group, slug=slug, hidden=False)
+    posts = FeedRows(group.posts.visible(), group=group)
     context = {
         'group': group,
-        'page_obj': page_navigator(request, posts),
+        'page_obj': await apage_navigator(
+            request, posts, count_name=f'group:{group.pk}'),
+        'edge_cached': True,
     }
-    return render(request, 'posts/group_list.html', context)
+    return await arender_feed(request, 'posts/group_list.html', context)
 
 
-def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('group')
-    following = (request.user.is_authenticated
-                 and author != request.user
-                 and Follow.objects.filter(author=author,
-                                           user=request.user
-                                           ).exists())
+def posts_count(author_field, posts=None):
+    """Число записей автора подзапросом в том же SELECT."""
+    if posts is None:
+        posts = Post.objects.filter(hidden=False)
+    counts = posts.filter(
+        author=OuterRef(author_field)
+    ).order_by().values('author').annotate(count=Count('pk'))
+    return Coalesce(
+        Subquery(counts.values('count'), output_field=IntegerField()), 0)
+
+
+def all_posts_count(author_field):
+    """То же вместе с архивом."""
+    return posts_count(author_field) + posts_count(
+        author_field, ArchivedPost.objects.all())
+
+
+@edge_cache(settings.EDGE_CACHE_TIMEOUT)
+async def profile(request, username):
+    # Два запроса: автор с числом записей и страница записей. Архив
+    # старше любой горячей записи и идет в ленте следом за ними.
+    author = await aget_object_or_404(
+        User.objects.annotate(
+            hot_count=posts_count('pk'),
+            archived_count=posts_count('pk', ArchivedPost.objects.all())),
+        ~Q(pk__in=users_being_deleted()), username=username)
+    author.posts_count = author.hot_count + author.archived_count
+    posts = ChainedRows(
+        FeedRows(author.posts.filter(hidden=False), author=author),
+        FeedRows(author.archived_posts.all(), author=author,
+                 row=ArchivedPostRow),
+        counts=(author.hot_count, author.archived_count))
     context = {
         'author': author,
-        'page_obj': page_navigator(request, posts),
-        'following': following,
+        'page_obj': await apage_navigator(
+            request, posts, count=author.posts_count),
+        'edge_cached': True,
     }
-    return render(request, 'posts/profile.html', context)
+    return await arender_feed(request, 'posts/profile.html', context)
 
 
-def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+def get_detail_post(post_id):
+    """Запись, а если ее уже перенесли в архив — архивная запись."""
+    for posts in (Post.objects.visible().select_related('body'),
+                  ArchivedPost.objects.visible()):
+        post = posts.select_related('author', 'group').annotate(
+            author_posts_count=all_posts_count('author')
+        ).filter(pk=post_id).first()
+        if post is not None:
+            return post
+    raise Http404
+
+
+aget_detail_post = sync_to_async(get_detail_post)
+
+
+def post_exists(post_id):
+    return (Post.objects.filter(pk=post_id).exists()
+            or ArchivedPost.objects.filter(pk=post_id).exists())
+
+
+@edge_cache(settings.EDGE_CACHE_TIMEOUT)
+async def post_detail(request, post_id):
+    # Запись с автором, группой, полным текстом и числом записей
+    # автора — один запрос, второй — комментарии. Архивная запись — на
+    # запрос больше.
+    post = await aget_detail_post(post_id)
+    comments = post.comments.select_related('author')
+    if isinstance(post, Post):
+        comments = comments.select_related('body')
     context = {
         'post': post,
         'form': CommentForm(request.POST or None),
-        'comments': post.comments.select_related('author')
+        'comments': comments.exclude(author__in=users_being_deleted()),
+        'edge_cached': True,
+    }
+    return await arender_feed(request, 'posts/post_detail.html', context)
+
+
+@never_cache
+def fragments(request, username=None, post_id=None):
+    """Персональные куски страниц, которые кэшируются для всех."""
+    def render_fragment(template_name, context=None):
+        return render_to_string(
+            template_name, context, request,
+            using=settings.FEED_TEMPLATE_ENGINE)
+
+    data = {
+        'nav': render_fragment('includes/user_nav.html'),
+        'switcher': render_fragment('posts/includes/switcher.html'),
     }
-    return render(request, 'posts/post_detail.html', context)
+    if username is not None:
+        author = get_object_or_404(User, username=username)
+        data['follow'] = render_fragment(
+            'posts/includes/follow_button.html', {
+                'author': author,
+                'following': is_following(request.user, author),
+            })
+    if post_id is not None:
+        post = Post.objects.only('author_id').filter(pk=post_id).first()
+        if post is None:
+            # Архивные записи только для чтения.
+            if not post_exists(post_id):
+                raise Http404
+            return JsonResponse(data)
+        data['edit'] = render_fragment(
+            'posts/includes/edit_link.html', {'post': post})
+        data['comment_form'] = render_fragment(
+            'posts/includes/comment_form.html',
+            {'post': post, 'form': CommentForm()})
+    return JsonResponse(data)
 
 
 @login_required
@@ -65,6 +189,8 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        prime_thumbnail_source(post)
+        schedule_variants(post)
         return redirect('posts:profile', post.author)
     form = PostForm()
     context = {
@@ -76,7 +202,7 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    if request.user != post.author:
+    if request.user.pk != post.author_id:
         return redirect('posts:post_detail', post.pk)
     form = PostForm(
         request.POST or None,
@@ -85,6 +211,9 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            prime_thumbnail_source(post)
+            schedule_variants(post)
         return redirect('posts:post_detail', post.pk)
     context = {
         'form': form,
@@ -94,15 +223,43 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
-def page_navigator(request, posts):
-    return Paginator(
-        posts, COUNT_POSTS).get_page(request.GET.get('page'))
+def page_navigator(request, posts, count=None, count_name=None):
+    paginator = WindowedPaginator(posts, COUNT_POSTS, count_name=count_name)
+    if count is not None:
+        # Число уже известно из аннотации, отдельный COUNT не нужен.
+        paginator.count = count
+    page = paginator.get_page(request.GET.get('page'))
+    prefetch_thumbnails(
+        [post.image for post in page if not post.image_variants],
+        '960x339', crop='center', upscale=True)
+    return page
+
+
+apage_navigator = sync_to_async(page_navigator)
+
+
+def event_response(request, channels):
+    # Под WSGI поток держал бы рабочий поток все EVENT_STREAM_LIFETIME
+    # секунд. 204 говорит EventSource больше не переподключаться.
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(
+        aevent_stream(channels), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def post_events(request, post_id):
+    if not await sync_to_async(post_exists)(post_id):
+        raise Http404
+    return event_response(request, [post_channel(post_id)])
 
 
 @login_required
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.visible(), pk=post_id)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
@@ -113,23 +270,25 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user
-    ).select_related('author', 'group')
+    posts = FeedRows(Post.objects.visible().filter(
+        author__following__user=request.user))
     context = {
         'page_obj': page_navigator(request, posts),
     }
-    return render(request, 'posts/follow.html', context)
+    return render_feed(request, 'posts/follow.html', context)
+
+
+@async_login_required
+async def follow_events(request):
+    authors = await sync_to_async(following_ids)(request.user)
+    return event_response(request, [author_channel(pk) for pk in authors])
 
 
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if author != request.user and not Follow.objects.filter(
-        user=request.user,
-        author=author
-    ).exists():
-        Follow.objects.create(user=request.user, author=author)
+    if author != request.user and not is_following(request.user, author):
+        Follow.objects.get_or_create(user=request.user, author=author)
 
     return redirect('posts:follow_index')
 
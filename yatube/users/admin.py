@@ -0,0 +1,14 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from posts.admin import BackgroundDeleteMixin
+
+User = get_user_model()
+
+
+class UserAdmin(BackgroundDeleteMixin, BaseUserAdmin):
+    pass
+
+
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
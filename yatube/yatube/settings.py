@@ -6,6 +6,10 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = '8r$)8(*z1p9skdkz2k6cz#n2-!64ac!m)(qs$ja)k%1#_5%-+q'
 
 DEBUG = True
+# django-debug-toolbar синхронный: с ним Django переводит всю цепочку
+# middleware в поток, и async-представления под ASGI теряют смысл.
+# Поэтому он подключается только при DEBUG и явном DEBUG_TOOLBAR=1.
+DEBUG_TOOLBAR = DEBUG and os.environ.get('DEBUG_TOOLBAR') == '1'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -30,20 +34,24 @@ INSTALLED_APPS = [
     'core',
     'about',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.profiling.ProfilerMiddleware',
+    'core.querylog.QueryStatsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
@@ -52,8 +60,13 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -63,9 +76,95 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'NAME': 'jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'jinja2')],
+        'OPTIONS': {
+            'environment': 'core.jinja_env.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
 ]
 
+# Движок для шаблонов ленты и записи: 'django' или 'jinja2'.
+FEED_TEMPLATE_ENGINE = 'django'
+# Отдавать ленты и записи потоком; по-настоящему кусками рендерит Jinja2.
+# Потоковые ответы не попадают в кэш страниц.
+FEED_STREAMING = False
+STREAM_CHUNK_SIZE = 4096
+# Выборочное профилирование запросов: доля запросов (0 — только по
+# заголовку X-Profile), частота снятия стека и куда складывать профили.
+PROFILER_SAMPLE_RATE: float = 0
+PROFILER_INTERVAL: float = 0.005
+PROFILER_MAX_SAMPLES: int = 2000
+PROFILER_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILER_MAX_FILES: int = 500
+PROFILER_TOKEN_MAX_AGE: int = 60 * 60
+
+# Статистика запросов по отпечаткам (manage.py top_queries) и журнал
+# запросов дольше SLOW_QUERY_THRESHOLD секунд. В продакшене включается
+# явно.
+QUERY_STATS_ENABLED = DEBUG
+QUERY_STATS_DIR = os.path.join(BASE_DIR, 'query_stats')
+QUERY_STATS_INTERVAL: int = 60
+QUERY_STATS_SAMPLES: int = 200
+SLOW_QUERY_THRESHOLD: float = 0.1
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'core.querylog.JsonFormatter'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Сколько чтений из БД может сделать страница; проверяется в тестах.
+# Ленты учитывают запрос метаданных миниатюр, если их нет в кэше.
+# profile: автор с числом записей и страница; post_detail: запись с
+# автором, группой и числом записей автора и комментарии.
+QUERY_BUDGETS: dict = {
+    'posts:index': 3,
+    'posts:group': 4,
+    'posts:profile': 3,
+    'posts:post_detail': 3,
+    'posts:follow_index': 5,
+    'posts:fragments': 2,
+    'posts:profile_fragments': 4,
+    'posts:post_fragments': 3,
+    'posts:post_create': 3,
+    'posts:post_edit': 4,
+}
+# Столько одинаковых запросов за один HTTP-запрос считаются N+1.
+QUERY_REPEAT_THRESHOLD: int = 3
+# Сколько секунд прокси может отдавать ленты и записи из своего кэша.
+EDGE_CACHE_TIMEOUT = 20
+
+# Сколько символов записи показывают ленты; остальное — на ее странице.
+EXCERPT_LENGTH: int = 300
+# Тексты записей и комментариев от стольких символов хранятся сжатыми:
+# в архиве — в той же колонке, у свежих — в PostBody и CommentBody.
+COMPRESSED_TEXT_THRESHOLD: int = 2048
+COMPRESSED_TEXT_LEVEL: int = 6
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
+ASGI_APPLICATION = 'yatube.asgi.application'
 
 
 DATABASES = {
@@ -75,6 +174,8 @@ DATABASES = {
     }
 }
 
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -98,15 +199,39 @@ TIME_ZONE = 'UTC'
 
 USE_I18N = True
 
-USE_L10N = True
-
 USE_TZ = True
 
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage'
+            if DEBUG else
+            'core.assets.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
+# Без DEBUG статику и медиа отдает core.assets.AssetsMiddleware.
+SERVE_ASSETS = not DEBUG
+STATIC_MAX_AGE: int = 365 * 24 * 60 * 60
+MEDIA_MAX_AGE: int = 365 * 24 * 60 * 60
 
 COUNT_POSTS: int = 10
+# Сколько страниц по обе стороны от текущей показывает пагинатор.
+PAGINATOR_WINDOW: int = 2
+# Число записей главной и групп берется из кэша и раз в FEED_COUNT_REFRESH
+# секунд пересчитывается в фоновом пуле (0 — сразу в запросе).
+FEED_COUNT_REFRESH: int = 60
+FEED_COUNT_TIMEOUT: int = 24 * 60 * 60
+FEED_COUNT_WORKERS: int = 1
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -124,5 +249,72 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'thumbnails': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'thumbnails',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
 }
+
+# Сессия и пользователь сессии читаются из кэша, в БД — только при
+# промахе. С LocMemCache, который у каждого процесса свой, сессии
+# хранятся только в БД: иначе выход в одном процессе не закрыл бы сессию
+# в других.
+SESSION_ENGINE = 'core.sessions'
+AUTHENTICATION_BACKENDS = ['core.auth.CachedModelBackend']
+# Сколько секунд хранится копия пользователя сессии. С LocMemCache копия
+# не кэшируется: блокировка не дошла бы до других процессов.
+USER_CACHE_TIMEOUT: int = 5 * 60
+# Сколько секунд хранится множество подписок пользователя. Подписка и
+# отписка сбрасывают его, следующее чтение берет его из БД.
+FOLLOWING_CACHE_TIMEOUT: int = 60 * 60
+
+DIGEST_PERIODS = {
+    'daily': 1,
+    'weekly': 7,
+}
+DIGEST_CHUNK_SIZE: int = 1000
+DIGEST_MAX_POSTS: int = 20
+DEFAULT_FROM_EMAIL = 'noreply@yatube.ru'
+SITE_URL = 'http://127.0.0.1:8000'
+
+EVENT_BUS = {
+    'BACKEND': 'posts.events.LocalEventBus',
+    'OPTIONS': {
+        'queue_size': 100,
+    },
+}
+EVENT_STREAM_LIFETIME: int = 300
+EVENT_STREAM_KEEPALIVE: int = 15
+
+POST_IMAGE_MAX_SIZE: int = 5 * 2 ** 20
+POST_IMAGE_MAX_PIXELS: int = 40 * 10 ** 6
+POST_IMAGE_MAX_SIDE: int = 1920
+POST_IMAGE_QUALITY: int = 80
+POST_IMAGE_VARIANT_WIDTHS = (320, 640, 960, 1440)
+POST_IMAGE_VARIANT_RATIO = (960, 339)
+POST_IMAGE_VARIANTS_WORKERS: int = 2
+
+THUMBNAIL_CACHE = 'thumbnails'
+THUMBNAIL_KVSTORE = 'core.thumbnail.KVStore'
+THUMBNAIL_LOCAL_CACHE_SIZE: int = 10000
+
+MEDIA_GC_GRACE_HOURS: int = 24
+# Сколько секунд загрузка может сослаться на уже существующий файл;
+# столько же фоновое удаление не трогает недавно загруженные файлы.
+MEDIA_UPLOAD_GRACE: int = 10 * 60
+
+# Пользователи, записи и группы из админки удаляются в фоне пачками по
+# DELETION_BATCH_SIZE строк (0 потоков — сразу после коммита).
+DELETION_WORKERS: int = 1
+DELETION_BATCH_SIZE: int = 500
+
+# manage.py archive_posts переносит записи старше ARCHIVE_AFTER_DAYS дней
+# в архивные таблицы; post_detail и profile читают и оттуда.
+ARCHIVE_AFTER_DAYS: int = 365
+ARCHIVE_BATCH_SIZE: int = 500
+
+URL_CACHE_SIZE: int = 10000